@@ -1,52 +1,136 @@
+import argparse
 import random
+import time
 import uuid
 import psycopg
 
 import datetime
+from concurrent.futures import ProcessPoolExecutor
 from faker import Faker
 
 
-if __name__ == '__main__':
-    fake = Faker()
+# Подготавливаем DSN (Data Source Name) для подключения к БД Postgres
+dsn = {
+    'dbname': 'movies_database',
+    'user': 'app',
+    'password': '123qwe',
+    'host': 'localhost',
+    'port': 5432,
+    'options': '-c search_path=content',
+}
 
-    # Подготавливаем DSN (Data Source Name) для подключения к БД Postgres
-    dsn = {
-        'dbname': 'movies_database',
-        'user': 'app',
-        'password': '123qwe',
-        'host': 'localhost',
-        'port': 5432,
-        'options': '-c search_path=content',
-    }
+ROLES = ['actor', 'producer', 'director']
+TYPES = ['movie', 'tv_show']
+
+# Пространство имён для детерминированных id: id записи вычисляется по её номеру,
+# поэтому процессы могут ссылаться на чужие записи без общего списка id.
+ID_NAMESPACE = uuid.UUID('6f1c1d1e-4c4f-4a39-9d5e-2b1f0e6f3a10')
+
+COPY_QUERIES = {
+    'film_work': 'COPY film_work (id, title, description, creation_date, rating, type, created, modified) FROM STDIN',
+    'genre': 'COPY genre (id, name, description, created, modified) FROM STDIN',
+    'person': 'COPY person (id, full_name, created, modified) FROM STDIN',
+    'genre_film_work': 'COPY genre_film_work (id, film_work_id, genre_id, created) FROM STDIN',
+    'person_film_work': 'COPY person_film_work (id, film_work_id, person_id, role, created) FROM STDIN',
+}
 
-    PERSONS_COUNT = 100000
 
+def make_id(seed: int, table_name: str, index: int) -> uuid.UUID:
+    return uuid.uuid5(ID_NAMESPACE, f'{seed}:{table_name}:{index}')
+
+
+def generate_rows(table_name: str, start: int, stop: int, volumes: dict, seed: int):
+    """Лениво генерирует строки таблицы для записей с номерами [start, stop).
+
+    Для таблиц связей номер — это номер кинопроизведения.
+    """
+    fake = Faker()
+    fake.seed_instance(f'{seed}:{table_name}:{start}')
+    rng = random.Random(f'{seed}:{table_name}:{start}')
     now = datetime.datetime.now(datetime.UTC)
 
-    # Установим соединение с БД с помощью контекстного менеджера with
-    # В конце блока автоматически закроется курсор и соединение
-    # Обратите внимание: для версий psycopg < 3 соединение нужно закрывать вручную
-    # https://www.psycopg.org/docs/connection.html
+    if table_name == 'film_work':
+        for i in range(start, stop):
+            # title уникален (миграция 0001), а Faker повторяет фразы: номер записи делает их разными.
+            yield (make_id(seed, 'film_work', i), f"{fake.sentence(nb_words=3).rstrip('.')} #{i}", fake.paragraph(),
+                   fake.date_between('-50y'), round(rng.uniform(0, 10), 1), rng.choice(TYPES), now, now)
+    elif table_name == 'genre':
+        for i in range(start, stop):
+            yield make_id(seed, 'genre', i), fake.word().capitalize(), fake.sentence(), now, now
+    elif table_name == 'person':
+        for i in range(start, stop):
+            yield make_id(seed, 'person', i), fake.name(), now, now
+    elif table_name == 'genre_film_work':
+        per_film = min(volumes['genres_per_film'], volumes['genre'])
+        for i in range(start, stop):
+            film_work_id = make_id(seed, 'film_work', i)
+            for genre_index in rng.sample(range(volumes['genre']), per_film):
+                yield (uuid.UUID(int=rng.getrandbits(128), version=4), film_work_id,
+                       make_id(seed, 'genre', genre_index), now)
+    elif table_name == 'person_film_work':
+        per_film = min(volumes['persons_per_film'], volumes['person'])
+        for i in range(start, stop):
+            film_work_id = make_id(seed, 'film_work', i)
+            for person_index in rng.sample(range(volumes['person']), per_film):
+                yield (uuid.UUID(int=rng.getrandbits(128), version=4), film_work_id,
+                       make_id(seed, 'person', person_index), rng.choice(ROLES), now)
+
+
+def copy_shard(table_name: str, start: int, stop: int, volumes: dict, seed: int) -> int:
+    # Каждый процесс пишет свою часть через COPY, не собирая строки в список.
+    rows = 0
     with psycopg.connect(**dsn) as conn, conn.cursor() as cur:
-        # Заполнение таблицы Person
-        persons_ids = [str(uuid.uuid4()) for _ in range(PERSONS_COUNT)]
-        query = 'INSERT INTO person (id, full_name, created, modified) VALUES (%s, %s, %s, %s)'
-        data = [(pk, fake.last_name(), now, now) for pk in persons_ids]
-        cur.executemany(query, data)
+        with cur.copy(COPY_QUERIES[table_name]) as copy:
+            for row in generate_rows(table_name, start, stop, volumes, seed):
+                copy.write_row(row)
+                rows += 1
         conn.commit()
+    return rows
 
-        # Заполнение таблицы PersonFilmWork
-        person_film_work_data = []
-        roles = ['actor', 'producer', 'director']
 
-        cur.execute('SELECT id FROM film_work')
-        film_works_ids = [data[0] for data in cur.fetchall()]
+def seed_table(pool: ProcessPoolExecutor, table_name: str, count: int, shards: int,
+               volumes: dict, seed: int):
+    started = time.perf_counter()
+    step = max(1, -(-count // shards))
+    futures = [
+        pool.submit(copy_shard, table_name, start, min(start + step, count), volumes, seed)
+        for start in range(0, count, step)
+    ]
+    rows = sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed else 0
+    print(f'{table_name}: {rows} строк за {elapsed:.1f} с — {rate:,.0f} строк/с')
 
-        for film_work_id in film_works_ids:
-            for person_id in random.sample(persons_ids, 5):
-                role = random.choice(roles)
-                person_film_work_data.append((str(uuid.uuid4()), film_work_id, person_id, role, now))
 
-        query = 'INSERT INTO person_film_work (id, film_work_id, person_id, role, created) VALUES (%s, %s, %s, %s, %s)'
-        cur.executemany(query, person_film_work_data)
-        conn.commit()
+def parse_args():
+    parser = argparse.ArgumentParser(description='Заполнение базы фейковыми данными для нагрузочного тестирования')
+    parser.add_argument('--film-works', type=int, default=10000)
+    parser.add_argument('--genres', type=int, default=100)
+    parser.add_argument('--persons', type=int, default=100000)
+    parser.add_argument('--genres-per-film', type=int, default=2)
+    parser.add_argument('--persons-per-film', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4, help='количество процессов-генераторов')
+    parser.add_argument('--shards', type=int, default=None, help='на сколько частей делить таблицу (по умолчанию 4 на процесс)')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    volumes = {
+        'film_work': args.film_works,
+        'genre': args.genres,
+        'person': args.persons,
+        'genres_per_film': args.genres_per_film,
+        'persons_per_film': args.persons_per_film,
+    }
+    shards = args.shards or args.workers * 4
+
+    # Таблицы связей ссылаются на кинопроизведения, жанры и персоны,
+    # поэтому заполняются последними.
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        seed_table(pool, 'film_work', args.film_works, shards, volumes, args.seed)
+        seed_table(pool, 'genre', args.genres, shards, volumes, args.seed)
+        seed_table(pool, 'person', args.persons, shards, volumes, args.seed)
+        seed_table(pool, 'genre_film_work', args.film_works, shards, volumes, args.seed)
+        seed_table(pool, 'person_film_work', args.film_works, shards, volumes, args.seed)
@@ -1,9 +1,10 @@
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'movies.apps.MoviesAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'movies.apps.MoviesConfig',
 ]
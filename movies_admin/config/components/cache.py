@@ -0,0 +1,10 @@
+# По умолчанию кэш в памяти процесса. Если приложение запущено в несколько процессов,
+# укажите CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache и каталог в CACHE_LOCATION,
+# чтобы готовые ответы API были общими для всех процессов.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'movies'),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+    }
+}
@@ -1,11 +1,21 @@
+# Соединения с базой:
+# - по умолчанию постоянные, живут DB_CONN_MAX_AGE секунд (0 — новое на каждый запрос, None — без ограничения);
+# - с DB_POOL=True соединения берутся из пула psycopg_pool (нужен пакет psycopg-pool), CONN_MAX_AGE тогда 0.
+# Пул у каждого процесса свой: DB_POOL_MAX_SIZE * число воркеров gunicorn должно помещаться в max_connections.
+DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '60')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'config.db.postgresql_pool' if DB_POOL else 'django.db.backends.postgresql',
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
         'PORT': os.environ.get('DB_PORT', 5432),
+        'CONN_MAX_AGE': 0 if DB_POOL else (None if DB_CONN_MAX_AGE == 'None' else int(DB_CONN_MAX_AGE)),
+        # Перед повторным использованием соединение проверяется, оборванное заменяется новым.
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
         'OPTIONS': {
             # Нужно явно указать схемы, с которыми будет работать приложение.
             'options': '-c search_path=public,content'
@@ -13,3 +23,11 @@ DATABASES = {
     }
 }
 
+if DB_POOL:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        # Сколько секунд запрос ждёт свободное соединение, прежде чем упасть с ошибкой.
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 600)),
+    }
@@ -0,0 +1,69 @@
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from psycopg import IsolationLevel
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError as e:
+    raise ImproperlyConfigured('Для пула соединений установите пакет psycopg-pool') from e
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с пулом соединений psycopg_pool, один пул на процесс.
+
+    Соединение берётся из пула при первом запросе к базе и возвращается в пул
+    при закрытии, то есть в конце каждого HTTP-запроса. Аргументы ConnectionPool
+    (min_size, max_size, timeout, ...) задаются в OPTIONS['pool'].
+    """
+
+    _connection_pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        if self.alias not in self._connection_pools:
+            with self._pools_lock:
+                if self.alias not in self._connection_pools:
+                    if self.settings_dict['CONN_MAX_AGE'] != 0:
+                        raise ImproperlyConfigured('Пул соединений несовместим с CONN_MAX_AGE, задайте CONN_MAX_AGE = 0')
+                    connect_kwargs = self.get_connection_params()
+                    #Django сам включит нужный режим после получения соединения
+                    connect_kwargs['autocommit'] = True
+                    health_check = ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+                    self._connection_pools[self.alias] = ConnectionPool(
+                        kwargs=connect_kwargs,
+                        open=False,
+                        name=self.alias,
+                        check=health_check,
+                        **self.settings_dict['OPTIONS'].get('pool', {}),
+                    )
+        return self._connection_pools[self.alias]
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        #служебное соединение к базе postgres (создание тестовой базы) идёт мимо пула
+        if self.alias == NO_DB_ALIAS:
+            return super().get_new_connection(conn_params)
+        self.pool.open()
+        connection = self.pool.getconn()
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is None:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+        else:
+            self.isolation_level = IsolationLevel(isolation_level)
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.alias == NO_DB_ALIAS:
+            return super()._close()
+        with self.wrap_database_errors:
+            self.pool.putconn(self.connection)
+            self.connection = None
@@ -45,6 +45,10 @@ include(
     'components/middleware.py'
 )
 
+include(
+    'components/cache.py'
+)
+
 
 ROOT_URLCONF = 'config.urls'
 
@@ -1,32 +1,72 @@
 from django.contrib import admin
+from django.contrib.postgres.aggregates import StringAgg
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.translation import gettext_lazy as _
 from .models import Genre
 from .models import FilmWork
 from .models import GenreFilmWork
 from .models import Person
 from .models import PersonFilmWork
+from .autocomplete import FastAutocompleteMixin
+from .inlines import PrefetchedInlineMixin
+from .pagination import KeysetPaginationMixin
+from .search import PostgresSearchMixin
 
 
 @admin.register(Genre)
-class GenreAdmin(admin.ModelAdmin):
+class GenreAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     list_display = ('name','description')  
+    keyset_ordering = ('name', 'id')
 
 @admin.register(Person)
-class PersonAdmin(admin.ModelAdmin):
+class PersonAdmin(FastAutocompleteMixin, PostgresSearchMixin, KeysetPaginationMixin, admin.ModelAdmin):
     #добавляем поле поиска по имени
     search_fields = ('full_name',)
+    trigram_search_field = 'full_name'
+    #автодополнение в PersonFilmWorkInline: префикс и триграммы, не больше 20 строк, без COUNT
+    autocomplete_search_field = 'full_name'
+    keyset_ordering = ('full_name', 'id')
       
 
-class PersonFilmWorkInline(admin.TabularInline):
+class PersonFilmWorkInline(PrefetchedInlineMixin, admin.TabularInline):
     model = PersonFilmWork
     #добавляем поле поиска по имени связь с search_fields
     autocomplete_fields = ('person',)
+    inline_select_related = ('person',)
 
-class GenreFilmWorkInline(admin.TabularInline):
+class GenreFilmWorkInline(PrefetchedInlineMixin, admin.TabularInline):
     model = GenreFilmWork
-    
+    inline_select_related = ('genre',)
+    #список жанров один на все строки
+    cached_choice_fields = ('genre',)
+
 @admin.register(FilmWork)
-class FilmWorkAdmin(admin.ModelAdmin):
+class FilmWorkAdmin(PostgresSearchMixin, KeysetPaginationMixin, admin.ModelAdmin):
     inlines = (GenreFilmWorkInline,PersonFilmWorkInline)
-    list_display = ('title', 'type', 'creation_date', 'rating',)
+    list_display = ('title', 'type', 'creation_date', 'rating', 'genre_names', 'persons_count')
     list_filter = ('type','creation_date',)
-    search_fields = ('title', 'description', 'id')   
\ No newline at end of file
+    search_fields = ('title', 'description', 'id')
+    #title и description ищутся по search_vector, id — точным совпадением
+    search_vector_field = 'search_vector'
+    #новые фильмы сверху, id делает порядок однозначным для навигации по курсору
+    keyset_ordering = ('-creation_date', '-id')
+
+    def get_queryset(self, request):
+        #жанры и число участников считаются подзапросами в том же запросе, что и список
+        genres = (GenreFilmWork.objects.filter(film_work=OuterRef('pk')).values('film_work')
+                  .annotate(names=StringAgg('genre__name', ', ', ordering='genre__name')).values('names'))
+        persons = (PersonFilmWork.objects.filter(film_work=OuterRef('pk')).values('film_work')
+                   .annotate(count=Count('id')).values('count'))
+        return super().get_queryset(request).defer('search_vector').annotate(
+            genre_names=Subquery(genres),
+            persons_count=Coalesce(Subquery(persons), 0),
+        )
+
+    @admin.display(description=_('genres'))
+    def genre_names(self, obj):
+        return obj.genre_names or ''
+
+    @admin.display(description=_('persons'), ordering='persons_count')
+    def persons_count(self, obj):
+        return obj.persons_count
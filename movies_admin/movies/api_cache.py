@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from django.db import connection
+
+# updated в документе фильма сдвигается при любом изменении фильма, его связей, жанров и участников.
+LAST_MODIFIED_SQL = """
+SELECT updated FROM content.film_work_document WHERE id = %s
+"""
+
+# Счётчик растёт при каждом коммите, изменившем документы фильмов (миграция 0010).
+LIST_VERSION_SQL = """
+SELECT version, modified FROM content.film_work_document_version
+"""
+
+
+def movies_version() -> tuple[int, datetime | None]:
+    """Версия списка фильмов и время её появления; версии идут в порядке коммитов."""
+    with connection.cursor() as cursor:
+        cursor.execute(LIST_VERSION_SQL)
+        row = cursor.fetchone()
+    return row if row else (0, None)
+
+
+def list_cache_key(version: int, position: str) -> str:
+    return f'movies_api:list:{version}:{position}'
+
+
+def detail_cache_key(pk) -> str:
+    return f'movies_api:detail:{pk}'
+
+
+def movie_last_modified(pk) -> datetime | None:
+    with connection.cursor() as cursor:
+        cursor.execute(LAST_MODIFIED_SQL, [pk])
+        row = cursor.fetchone()
+    return row[0] if row else None
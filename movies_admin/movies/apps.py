@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.contrib.admin.apps import AdminConfig
 from django.utils.translation import gettext_lazy as _
 
 
@@ -7,3 +8,8 @@ class MoviesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = ('movies')
     verbose_name = _('movies')
+
+
+class MoviesAdminConfig(AdminConfig):
+    #своя админка с быстрым автодополнением, см. movies/autocomplete.py
+    default_site = 'movies.sites.MoviesAdminSite'
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.admin.views.autocomplete import AutocompleteJsonView
+from django.core.exceptions import PermissionDenied
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Collate, Upper
+from django.http import JsonResponse
+
+AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_CACHE_SIZE = 1024
+# Сколько секунд ответ живёт в кэше; в других процессах новые записи появятся не позже.
+AUTOCOMPLETE_CACHE_TTL = 60
+# В строке короче трёх символов нет триграмм, такой запрос ищется по префиксу.
+TRIGRAM_MIN_LENGTH = 3
+
+
+def prefix_range(prefix: str) -> tuple[str, str]:
+    """Границы [prefix, следующий) для строк с этим префиксом в побайтовом порядке (COLLATE "C")."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class TTLCache:
+    """LRU-кэш в памяти процесса: не больше maxsize записей, каждая живёт ttl секунд."""
+
+    def __init__(self, maxsize: int = AUTOCOMPLETE_CACHE_SIZE, ttl: float = AUTOCOMPLETE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FastAutocompleteMixin:
+    """Автодополнение без COUNT и OFFSET для ModelAdmin с большим числом строк.
+
+    Отдаёт не больше autocomplete_limit строк: сначала те, что начинаются с введённого текста,
+    затем остальные совпадения. Ответы кэшируются по введённому тексту в памяти процесса,
+    сохранение и удаление через эту админку кэш сбрасывают.
+    """
+
+    autocomplete_search_field = None
+    autocomplete_limit = AUTOCOMPLETE_LIMIT
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.autocomplete_cache = TTLCache()
+
+    def get_autocomplete_queryset(self, request, queryset, term):
+        field = self.autocomplete_search_field
+        if not term:
+            return queryset.order_by(field, 'pk')
+        if len(term) < TRIGRAM_MIN_LENGTH:
+            #короткие префиксы встречаются часто; LIKE по UPPER(поле) индекс (full_name, id) не использует,
+            #а диапазон по UPPER(поле) COLLATE "C" читается по индексу (UPPER(full_name) COLLATE "C", id)
+            #сразу в порядке выдачи, без сортировки всех совпадений
+            lower, upper = prefix_range(term.upper())
+            return (queryset.alias(autocomplete_key=Collate(Upper(field), 'C'))
+                    .filter(autocomplete_key__gte=lower, autocomplete_key__lt=upper)
+                    .order_by('autocomplete_key', 'pk'))
+        queryset, _ = self.get_search_results(request, queryset, term)
+        prefix = Case(When(**{f'{field}__istartswith': term}, then=Value(0)), default=Value(1),
+                      output_field=IntegerField())
+        return queryset.annotate(autocomplete_prefix=prefix).order_by('autocomplete_prefix', field, 'pk')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self.autocomplete_cache.clear()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.autocomplete_cache.clear()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        self.autocomplete_cache.clear()
+
+
+class CachedAutocompleteJsonView(AutocompleteJsonView):
+    """Автодополнение админки: модели с FastAutocompleteMixin ищутся через него, остальные — как в Django."""
+
+    def get(self, request, *args, **kwargs):
+        term, model_admin, source_field, to_field_name = self.process_request(request)
+        if not isinstance(model_admin, FastAutocompleteMixin):
+            return super().get(request, *args, **kwargs)
+        self.term, self.model_admin, self.source_field = term, model_admin, source_field
+        if not self.has_perm(request):
+            raise PermissionDenied
+
+        term = term.strip()
+        #поиск без учёта регистра, поэтому в ключе текст в верхнем регистре
+        key = (source_field.model._meta.label_lower, source_field.name, to_field_name, term.upper())
+        data = model_admin.autocomplete_cache.get(key)
+        if data is None:
+            queryset = model_admin.get_queryset(request).complex_filter(source_field.get_limit_choices_to())
+            queryset = model_admin.get_autocomplete_queryset(request, queryset, term)
+            rows = queryset.only(to_field_name, model_admin.autocomplete_search_field)[:model_admin.autocomplete_limit]
+            #следующих страниц нет: если нужного нет в первых строках, запрос уточняют
+            data = {
+                'results': [self.serialize_result(obj, to_field_name) for obj in rows],
+                'pagination': {'more': False},
+            }
+            model_admin.autocomplete_cache.set(key, data)
+        return JsonResponse(data)
@@ -0,0 +1,67 @@
+from django import forms
+from django.contrib.admin.widgets import AutocompleteSelect
+
+
+class PrefetchedAutocompleteSelect(AutocompleteSelect):
+    """AutocompleteSelect, которому подпись выбранного значения передаёт форма.
+
+    Стандартный виджет на каждую строку inline отдельным запросом достаёт объект,
+    чтобы показать его имя, хотя связь уже загружена через select_related.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.labels = {}
+
+    def optgroups(self, name, value, attr=None):
+        selected = [str(v) for v in value if str(v) not in self.choices.field.empty_values]
+        if not selected or any(v not in self.labels for v in selected):
+            return super().optgroups(name, value, attr)
+        groups = [(None, [], 0)]
+        options = groups[0][1]
+        if not self.is_required and not self.allow_multiple_selected:
+            options.append(self.create_option(name, '', '', False, 0))
+        for option_value in selected:
+            options.append(self.create_option(name, option_value, self.labels[option_value], True, len(options)))
+        return groups
+
+
+class PrefetchedLabelsForm(forms.ModelForm):
+    """Передаёт PrefetchedAutocompleteSelect подпись из связи, уже загруженной вместе со строкой."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            related_id = getattr(self.instance, f'{name}_id', None)
+            if isinstance(widget, PrefetchedAutocompleteSelect) and related_id is not None:
+                widget.labels = {str(related_id): field.label_from_instance(getattr(self.instance, name))}
+
+
+class PrefetchedInlineMixin:
+    """Inline, который рисует все строки за постоянное число запросов.
+
+    inline_select_related — связи, которые загружаются вместе со строками;
+    cached_choice_fields — обычные select, их варианты выбираются из базы один раз за запрос,
+    а не в каждой строке. Для autocomplete_fields подпись берётся из загруженной связи.
+    """
+
+    form = PrefetchedLabelsForm
+    inline_select_related = ()
+    cached_choice_fields = ()
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(*self.inline_select_related)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if 'widget' not in kwargs and db_field.name in self.get_autocomplete_fields(request):
+            kwargs['widget'] = PrefetchedAutocompleteSelect(db_field, self.admin_site, using=kwargs.get('using'))
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if formfield is not None and db_field.name in self.cached_choice_fields:
+            #get_formset вызывается несколько раз за запрос, поэтому варианты храним на request
+            cache = request.__dict__.setdefault('_cached_choices', {})
+            key = (type(self).__name__, db_field.name)
+            if key not in cache:
+                cache[key] = list(formfield.choices)
+            formfield.choices = cache[key]
+        return formfield
@@ -0,0 +1,93 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+
+def timed_get(url: str, timeout: float) -> tuple[float, int | None]:
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = None
+    return time.perf_counter() - started, status
+
+
+def percentile(values: list[float], share: float) -> float:
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку запросов к запущенному серверу. Запустите сервер с разными '
+            'DB_CONN_MAX_AGE / DB_POOL и сравните результаты (--label, --output, --compare).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/v1/movies/')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Сколько запросов выполняется одновременно')
+        parser.add_argument('--warmup', type=int, default=50,
+                            help='Сколько запросов сделать до замера, чтобы открылись соединения')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--label', default='', help='Название замера, например «CONN_MAX_AGE=0»')
+        parser.add_argument('--output', help='Дописать результат в JSON lines')
+        parser.add_argument('--compare', help='Вывести таблицу по всем замерам из этого файла и выйти')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            self.compare(options['compare'])
+            return
+        url, timeout = options['url'], options['timeout']
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            list(executor.map(lambda _: timed_get(url, timeout), range(options['warmup'])))
+            started = time.perf_counter()
+            results = list(executor.map(lambda _: timed_get(url, timeout), range(options['requests'])))
+            elapsed = time.perf_counter() - started
+
+        latencies = sorted(seconds * 1000 for seconds, status in results if status == 200)
+        errors = len(results) - len(latencies)
+        if not latencies:
+            self.stderr.write(f'Ни один запрос к {url} не завершился успешно')
+            return
+        result = {
+            'label': options['label'],
+            'url': url,
+            'requests': len(results),
+            'concurrency': options['concurrency'],
+            'errors': errors,
+            'rps': len(results) / elapsed,
+            'mean_ms': statistics.fmean(latencies),
+            'p50_ms': percentile(latencies, 0.5),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'max_ms': latencies[-1],
+        }
+        self.stdout.write(
+            f"{result['label'] or url}: {result['rps']:.0f} запросов/с, p50 {result['p50_ms']:.1f} мс, "
+            f"p95 {result['p95_ms']:.1f} мс, p99 {result['p99_ms']:.1f} мс, ошибок {errors}"
+        )
+        if options['output']:
+            with open(options['output'], 'a', encoding='utf-8') as output:
+                output.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+    def compare(self, path: str):
+        with open(path, encoding='utf-8') as results:
+            rows = [json.loads(line) for line in results if line.strip()]
+        if not rows:
+            return
+        base = rows[0]
+        self.stdout.write(f"{'замер':<30} {'запросов/с':>11} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'ошибок':>7}")
+        for row in rows:
+            change = f" ({row['p50_ms'] / base['p50_ms'] - 1:+.0%} p50)" if row is not base else ''
+            self.stdout.write(
+                f"{row['label'] or row['url']:<30} {row['rps']:>11.0f} {row['p50_ms']:>9.1f} "
+                f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['errors']:>7}{change}"
+            )
@@ -0,0 +1,44 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+NEXT_IDS_SQL = "SELECT id FROM content.film_work WHERE id > %s ORDER BY id LIMIT %s"
+REFRESH_SQL = "SELECT content.film_work_document_refresh(%s::uuid[])"
+DELETE_ORPHANS_SQL = """
+DELETE FROM content.film_work_document d
+WHERE NOT EXISTS (SELECT 1 FROM content.film_work fw WHERE fw.id = d.id)
+"""
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает content.film_work_document для всех фильмов. '
+            'Обычно таблицу ведут триггеры; команда нужна после загрузки в обход них (--bulk, --swap).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Сколько фильмов пересчитывать в одной транзакции')
+
+    def handle(self, *args, batch_size, **options):
+        started = time.perf_counter()
+        #идём по id пачками: таблица всё время заполнена, а транзакции короткие
+        last_id = uuid.UUID(int=0)
+        total = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(NEXT_IDS_SQL, [last_id, batch_size])
+                ids = [row[0] for row in cursor.fetchall()]
+                if not ids:
+                    break
+                cursor.execute(REFRESH_SQL, [ids])
+            last_id = ids[-1]
+            total += len(ids)
+            self.stdout.write(f'Пересчитано фильмов: {total}')
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(DELETE_ORPHANS_SQL)
+            deleted = cursor.rowcount
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ content.film_work_document пересобрана: {total} фильмов, '
+            f'удалено лишних строк: {deleted}, {time.perf_counter() - started:.1f} с'
+        ))
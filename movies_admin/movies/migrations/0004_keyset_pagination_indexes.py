@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_filmwork_file_path'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='filmwork',
+            index=models.Index(models.OrderBy(models.F('creation_date'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='film_work_creation_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='genre',
+            index=models.Index(fields=['name', 'id'], name='genre_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['full_name', 'id'], name='person_full_name_id_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+import django.db.models.functions.text
+
+# Поисковый вектор собирается по двум конфигурациям, как и локали приложения:
+# russian приводит к основе русские слова, english — английские. Заголовок весит больше описания.
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION content.film_work_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER film_work_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description ON content.film_work
+FOR EACH ROW EXECUTE FUNCTION content.film_work_search_vector_update();
+
+UPDATE content.film_work SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_FUNCTION = """
+DROP TRIGGER IF EXISTS film_work_search_vector_trigger ON content.film_work;
+DROP FUNCTION IF EXISTS content.film_work_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='filmwork',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_FUNCTION, DROP_SEARCH_VECTOR_FUNCTION),
+        migrations.AddIndex(
+            model_name='filmwork',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='film_work_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('full_name'), name='gin_trgm_ops'), name='person_full_name_trgm_idx'),
+        ),
+    ]
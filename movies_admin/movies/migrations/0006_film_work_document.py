@@ -0,0 +1,200 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:05
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+# Одна строка на фильм: жанры и участники по ролям уже собраны в массивы.
+# Роли — значения PersonFilmWork.RoleChoices.
+FILM_WORK_DOCUMENT = """
+CREATE TABLE IF NOT EXISTS content.film_work_document (
+    id uuid PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    creation_date DATE,
+    rating FLOAT,
+    type TEXT NOT NULL,
+    genres TEXT[] NOT NULL,
+    genre_ids uuid[] NOT NULL,
+    actors TEXT[] NOT NULL,
+    actor_ids uuid[] NOT NULL,
+    directors TEXT[] NOT NULL,
+    director_ids uuid[] NOT NULL,
+    writers TEXT[] NOT NULL,
+    writer_ids uuid[] NOT NULL,
+    updated TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS film_work_document_creation_date_id_idx
+    ON content.film_work_document (creation_date DESC NULLS LAST, id DESC);
+
+CREATE OR REPLACE FUNCTION content.film_work_document_refresh(ids uuid[]) RETURNS void AS $$
+INSERT INTO content.film_work_document (
+    id, title, description, creation_date, rating, type, genres, genre_ids,
+    actors, actor_ids, directors, director_ids, writers, writer_ids, updated
+)
+SELECT fw.id, fw.title, fw.description, fw.creation_date, fw.rating, fw.type,
+       COALESCE(g.names, '{}'), COALESCE(g.ids, '{}'),
+       COALESCE(p.actors, '{}'), COALESCE(p.actor_ids, '{}'),
+       COALESCE(p.directors, '{}'), COALESCE(p.director_ids, '{}'),
+       COALESCE(p.writers, '{}'), COALESCE(p.writer_ids, '{}'),
+       clock_timestamp()
+FROM content.film_work fw
+LEFT JOIN LATERAL (
+    SELECT array_agg(g.name ORDER BY g.name) AS names, array_agg(g.id ORDER BY g.name) AS ids
+    FROM content.genre_film_work gfw
+    JOIN content.genre g ON g.id = gfw.genre_id
+    WHERE gfw.film_work_id = fw.id
+) g ON true
+LEFT JOIN LATERAL (
+    SELECT array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role = 'AC') AS actors,
+           array_agg(p.id ORDER BY p.full_name) FILTER (WHERE pfw.role = 'AC') AS actor_ids,
+           array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role = 'DI') AS directors,
+           array_agg(p.id ORDER BY p.full_name) FILTER (WHERE pfw.role = 'DI') AS director_ids,
+           array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role = 'WR') AS writers,
+           array_agg(p.id ORDER BY p.full_name) FILTER (WHERE pfw.role = 'WR') AS writer_ids
+    FROM content.person_film_work pfw
+    JOIN content.person p ON p.id = pfw.person_id
+    WHERE pfw.film_work_id = fw.id
+) p ON true
+WHERE fw.id = ANY(ids)
+ON CONFLICT (id) DO UPDATE SET
+    title = EXCLUDED.title,
+    description = EXCLUDED.description,
+    creation_date = EXCLUDED.creation_date,
+    rating = EXCLUDED.rating,
+    type = EXCLUDED.type,
+    genres = EXCLUDED.genres,
+    genre_ids = EXCLUDED.genre_ids,
+    actors = EXCLUDED.actors,
+    actor_ids = EXCLUDED.actor_ids,
+    directors = EXCLUDED.directors,
+    director_ids = EXCLUDED.director_ids,
+    writers = EXCLUDED.writers,
+    writer_ids = EXCLUDED.writer_ids,
+    updated = EXCLUDED.updated;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION content.film_work_document_film_work() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM content.film_work_document WHERE id IN (SELECT id FROM old_rows);
+    ELSE
+        PERFORM content.film_work_document_refresh(ARRAY(SELECT id FROM new_rows));
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_document_links() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM content.film_work_document_refresh(ARRAY(SELECT DISTINCT film_work_id FROM new_rows));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM content.film_work_document_refresh(ARRAY(SELECT DISTINCT film_work_id FROM old_rows));
+    ELSE
+        PERFORM content.film_work_document_refresh(ARRAY(
+            SELECT film_work_id FROM new_rows UNION SELECT film_work_id FROM old_rows
+        ));
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_document_genre() RETURNS trigger AS $$
+BEGIN
+    PERFORM content.film_work_document_refresh(ARRAY(
+        SELECT DISTINCT gfw.film_work_id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN content.genre_film_work gfw ON gfw.genre_id = n.id
+        WHERE n.name IS DISTINCT FROM o.name
+    ));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_document_person() RETURNS trigger AS $$
+BEGIN
+    PERFORM content.film_work_document_refresh(ARRAY(
+        SELECT DISTINCT pfw.film_work_id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN content.person_film_work pfw ON pfw.person_id = n.id
+        WHERE n.full_name IS DISTINCT FROM o.full_name
+    ));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# Триггеры уровня оператора с таблицами переходов: пачка из COPY или bulk_create
+# пересчитывает каждый затронутый фильм один раз. Удаление жанра или участника
+# каскадно удаляет связи и пересчитывается через триггеры связей.
+DOCUMENT_TRIGGERS = (
+    ('film_work', 'film_work_document_film_work', ('INSERT', 'UPDATE', 'DELETE')),
+    ('genre_film_work', 'film_work_document_links', ('INSERT', 'UPDATE', 'DELETE')),
+    ('person_film_work', 'film_work_document_links', ('INSERT', 'UPDATE', 'DELETE')),
+    ('genre', 'film_work_document_genre', ('UPDATE',)),
+    ('person', 'film_work_document_person', ('UPDATE',)),
+)
+TRANSITION_TABLES = {
+    'INSERT': 'NEW TABLE AS new_rows',
+    'UPDATE': 'OLD TABLE AS old_rows NEW TABLE AS new_rows',
+    'DELETE': 'OLD TABLE AS old_rows',
+}
+
+CREATE_TRIGGERS = '\n'.join(
+    f"CREATE TRIGGER film_work_document_{event.lower()} AFTER {event} ON content.{table} "
+    f"REFERENCING {TRANSITION_TABLES[event]} FOR EACH STATEMENT EXECUTE FUNCTION content.{function}();"
+    for table, function, events in DOCUMENT_TRIGGERS for event in events
+)
+
+FILL_FILM_WORK_DOCUMENT = "SELECT content.film_work_document_refresh(ARRAY(SELECT id FROM content.film_work));"
+
+DROP_FILM_WORK_DOCUMENT = '\n'.join(
+    f"DROP TRIGGER IF EXISTS film_work_document_{event.lower()} ON content.{table};"
+    for table, _, events in DOCUMENT_TRIGGERS for event in events
+) + """
+DROP FUNCTION IF EXISTS content.film_work_document_film_work();
+DROP FUNCTION IF EXISTS content.film_work_document_links();
+DROP FUNCTION IF EXISTS content.film_work_document_genre();
+DROP FUNCTION IF EXISTS content.film_work_document_person();
+DROP FUNCTION IF EXISTS content.film_work_document_refresh(uuid[]);
+DROP TABLE IF EXISTS content.film_work_document;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_search_vector_and_trigram'),
+    ]
+
+    operations = [
+        migrations.RunSQL('\n'.join([FILM_WORK_DOCUMENT, CREATE_TRIGGERS, FILL_FILM_WORK_DOCUMENT]),
+                          DROP_FILM_WORK_DOCUMENT),
+        migrations.CreateModel(
+            name='FilmWorkDocument',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('title', models.TextField()),
+                ('description', models.TextField(null=True)),
+                ('creation_date', models.DateField(null=True)),
+                ('rating', models.FloatField(null=True)),
+                ('type', models.TextField()),
+                ('genres', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+                ('genre_ids', django.contrib.postgres.fields.ArrayField(base_field=models.UUIDField(), size=None)),
+                ('actors', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+                ('actor_ids', django.contrib.postgres.fields.ArrayField(base_field=models.UUIDField(), size=None)),
+                ('directors', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+                ('director_ids', django.contrib.postgres.fields.ArrayField(base_field=models.UUIDField(), size=None)),
+                ('writers', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+                ('writer_ids', django.contrib.postgres.fields.ArrayField(base_field=models.UUIDField(), size=None)),
+                ('updated', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'content"."film_work_document',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:10
+
+from importlib import import_module
+
+from django.db import migrations
+
+# Прежнее определение функции — для отката.
+FILM_WORK_DOCUMENT = import_module('movies.migrations.0006_film_work_document').FILM_WORK_DOCUMENT
+
+# Связи фильма могут меняться параллельно (например, загрузчик пишет genre_film_work
+# и person_film_work в разных процессах). Без блокировки каждая транзакция собирает
+# документ по своему снимку, и последняя запись затирает изменения другой.
+# FOR NO KEY UPDATE не конфликтует с FOR KEY SHARE, который берут проверки внешних ключей
+# при вставке связей, поэтому ждут друг друга только пересчёты одного и того же фильма.
+# После ожидания INSERT берёт новый снимок и видит связи, закоммиченные соседом.
+FILM_WORK_DOCUMENT_REFRESH = """
+CREATE OR REPLACE FUNCTION content.film_work_document_refresh(ids uuid[]) RETURNS void AS $$
+BEGIN
+    PERFORM 1 FROM content.film_work WHERE id = ANY(ids) ORDER BY id FOR NO KEY UPDATE;
+
+    INSERT INTO content.film_work_document (
+        id, title, description, creation_date, rating, type, genres, genre_ids,
+        actors, actor_ids, directors, director_ids, writers, writer_ids, updated
+    )
+    SELECT fw.id, fw.title, fw.description, fw.creation_date, fw.rating, fw.type,
+           COALESCE(g.names, '{}'), COALESCE(g.ids, '{}'),
+           COALESCE(p.actors, '{}'), COALESCE(p.actor_ids, '{}'),
+           COALESCE(p.directors, '{}'), COALESCE(p.director_ids, '{}'),
+           COALESCE(p.writers, '{}'), COALESCE(p.writer_ids, '{}'),
+           clock_timestamp()
+    FROM content.film_work fw
+    LEFT JOIN LATERAL (
+        SELECT array_agg(g.name ORDER BY g.name) AS names, array_agg(g.id ORDER BY g.name) AS ids
+        FROM content.genre_film_work gfw
+        JOIN content.genre g ON g.id = gfw.genre_id
+        WHERE gfw.film_work_id = fw.id
+    ) g ON true
+    LEFT JOIN LATERAL (
+        SELECT array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role = 'AC') AS actors,
+               array_agg(p.id ORDER BY p.full_name) FILTER (WHERE pfw.role = 'AC') AS actor_ids,
+               array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role = 'DI') AS directors,
+               array_agg(p.id ORDER BY p.full_name) FILTER (WHERE pfw.role = 'DI') AS director_ids,
+               array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role = 'WR') AS writers,
+               array_agg(p.id ORDER BY p.full_name) FILTER (WHERE pfw.role = 'WR') AS writer_ids
+        FROM content.person_film_work pfw
+        JOIN content.person p ON p.id = pfw.person_id
+        WHERE pfw.film_work_id = fw.id
+    ) p ON true
+    WHERE fw.id = ANY(ids)
+    ON CONFLICT (id) DO UPDATE SET
+        title = EXCLUDED.title,
+        description = EXCLUDED.description,
+        creation_date = EXCLUDED.creation_date,
+        rating = EXCLUDED.rating,
+        type = EXCLUDED.type,
+        genres = EXCLUDED.genres,
+        genre_ids = EXCLUDED.genre_ids,
+        actors = EXCLUDED.actors,
+        actor_ids = EXCLUDED.actor_ids,
+        directors = EXCLUDED.directors,
+        director_ids = EXCLUDED.director_ids,
+        writers = EXCLUDED.writers,
+        writer_ids = EXCLUDED.writer_ids,
+        updated = EXCLUDED.updated;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_film_work_document'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FILM_WORK_DOCUMENT_REFRESH, FILM_WORK_DOCUMENT),
+    ]
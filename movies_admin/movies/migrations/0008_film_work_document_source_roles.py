@@ -0,0 +1,83 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:40
+
+from importlib import import_module
+
+from django.db import migrations
+
+# Прежнее определение функции — для отката.
+FILM_WORK_DOCUMENT_LOCK = import_module('movies.migrations.0007_film_work_document_lock').FILM_WORK_DOCUMENT_REFRESH
+
+# Загрузчик из SQLite и генератор тестовых данных пишут роли как есть (actor, director, writer),
+# админка — значениями PersonFilmWork.RoleChoices (AC, DI, WR). В документ попадают оба написания.
+FILM_WORK_DOCUMENT_REFRESH = """
+CREATE OR REPLACE FUNCTION content.film_work_document_refresh(ids uuid[]) RETURNS void AS $$
+BEGIN
+    PERFORM 1 FROM content.film_work WHERE id = ANY(ids) ORDER BY id FOR NO KEY UPDATE;
+
+    INSERT INTO content.film_work_document (
+        id, title, description, creation_date, rating, type, genres, genre_ids,
+        actors, actor_ids, directors, director_ids, writers, writer_ids, updated
+    )
+    SELECT fw.id, fw.title, fw.description, fw.creation_date, fw.rating, fw.type,
+           COALESCE(g.names, '{}'), COALESCE(g.ids, '{}'),
+           COALESCE(p.actors, '{}'), COALESCE(p.actor_ids, '{}'),
+           COALESCE(p.directors, '{}'), COALESCE(p.director_ids, '{}'),
+           COALESCE(p.writers, '{}'), COALESCE(p.writer_ids, '{}'),
+           clock_timestamp()
+    FROM content.film_work fw
+    LEFT JOIN LATERAL (
+        SELECT array_agg(g.name ORDER BY g.name) AS names, array_agg(g.id ORDER BY g.name) AS ids
+        FROM content.genre_film_work gfw
+        JOIN content.genre g ON g.id = gfw.genre_id
+        WHERE gfw.film_work_id = fw.id
+    ) g ON true
+    LEFT JOIN LATERAL (
+        SELECT array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role IN ('AC', 'actor')) AS actors,
+               array_agg(p.id ORDER BY p.full_name) FILTER (WHERE pfw.role IN ('AC', 'actor')) AS actor_ids,
+               array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role IN ('DI', 'director')) AS directors,
+               array_agg(p.id ORDER BY p.full_name) FILTER (WHERE pfw.role IN ('DI', 'director')) AS director_ids,
+               array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role IN ('WR', 'writer')) AS writers,
+               array_agg(p.id ORDER BY p.full_name) FILTER (WHERE pfw.role IN ('WR', 'writer')) AS writer_ids
+        FROM content.person_film_work pfw
+        JOIN content.person p ON p.id = pfw.person_id
+        WHERE pfw.film_work_id = fw.id
+    ) p ON true
+    WHERE fw.id = ANY(ids)
+    ON CONFLICT (id) DO UPDATE SET
+        title = EXCLUDED.title,
+        description = EXCLUDED.description,
+        creation_date = EXCLUDED.creation_date,
+        rating = EXCLUDED.rating,
+        type = EXCLUDED.type,
+        genres = EXCLUDED.genres,
+        genre_ids = EXCLUDED.genre_ids,
+        actors = EXCLUDED.actors,
+        actor_ids = EXCLUDED.actor_ids,
+        directors = EXCLUDED.directors,
+        director_ids = EXCLUDED.director_ids,
+        writers = EXCLUDED.writers,
+        writer_ids = EXCLUDED.writer_ids,
+        updated = EXCLUDED.updated;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+# Документы фильмов, у которых роли записаны словами, собираются заново.
+REFRESH_SOURCE_ROLES = """
+SELECT content.film_work_document_refresh(ARRAY(
+    SELECT DISTINCT film_work_id FROM content.person_film_work WHERE role IN ('actor', 'director', 'writer')
+));
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_film_work_document_lock'),
+    ]
+
+    operations = [
+        migrations.RunSQL('\n'.join([FILM_WORK_DOCUMENT_REFRESH, REFRESH_SOURCE_ROLES]),
+                          '\n'.join([FILM_WORK_DOCUMENT_LOCK, REFRESH_SOURCE_ROLES])),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.11 on 2026-10-18 20:05
+
+from django.db import migrations
+
+# Версия списка фильмов для ETag и Last-Modified берётся из данных: наибольшее updated
+# среди документов и наибольшее время удаления фильма. Удалённый документ своего
+# updated не оставляет, поэтому удаления записываются отдельно. Таблица только
+# пополняется, и параллельные транзакции не ждут друг друга на одной строке.
+FILM_WORK_DOCUMENT_LIST_VERSION = """
+CREATE INDEX IF NOT EXISTS film_work_document_updated_idx ON content.film_work_document (updated);
+
+CREATE TABLE IF NOT EXISTS content.film_work_document_deleted (
+    id uuid NOT NULL,
+    deleted TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS film_work_document_deleted_deleted_idx ON content.film_work_document_deleted (deleted);
+
+CREATE OR REPLACE FUNCTION content.film_work_document_film_work() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM content.film_work_document WHERE id IN (SELECT id FROM old_rows);
+        INSERT INTO content.film_work_document_deleted (id, deleted) SELECT id, clock_timestamp() FROM old_rows;
+    ELSE
+        PERFORM content.film_work_document_refresh(ARRAY(SELECT id FROM new_rows));
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+DROP_FILM_WORK_DOCUMENT_LIST_VERSION = """
+CREATE OR REPLACE FUNCTION content.film_work_document_film_work() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM content.film_work_document WHERE id IN (SELECT id FROM old_rows);
+    ELSE
+        PERFORM content.film_work_document_refresh(ARRAY(SELECT id FROM new_rows));
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TABLE IF EXISTS content.film_work_document_deleted;
+DROP INDEX IF EXISTS content.film_work_document_updated_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0008_film_work_document_source_roles'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FILM_WORK_DOCUMENT_LIST_VERSION, DROP_FILM_WORK_DOCUMENT_LIST_VERSION),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.11 on 2026-10-18 21:10
+
+from importlib import import_module
+
+from django.db import migrations
+
+# Прежняя версия списка — для отката.
+LIST_VERSION_0009 = import_module('movies.migrations.0009_film_work_document_list_version')
+
+# Версия списка фильмов — счётчик в одной строке. updated документа ставится при записи,
+# а не при коммите, поэтому max(updated) мог не вырасти после коммита более старой транзакции.
+# Счётчик увеличивает отложенный триггер: он срабатывает при коммите, один раз за транзакцию,
+# и ждёт блокировку строки, пока не закоммитится предыдущая. Так порядок версий совпадает
+# с порядком коммитов, а пока транзакция не закоммичена, в цикл взаимных блокировок
+# строка счётчика не попадает: её берут последней.
+FILM_WORK_DOCUMENT_VERSION = """
+CREATE TABLE IF NOT EXISTS content.film_work_document_version (
+    id boolean PRIMARY KEY DEFAULT true CHECK (id),
+    version bigint NOT NULL,
+    modified TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+INSERT INTO content.film_work_document_version (id, version, modified)
+VALUES (true, 1, clock_timestamp())
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION content.film_work_document_version_bump() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.film_work_document_version_bumped', true) IS DISTINCT FROM 'on' THEN
+        UPDATE content.film_work_document_version SET version = version + 1, modified = clock_timestamp();
+        PERFORM set_config('content.film_work_document_version_bumped', 'on', true);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE CONSTRAINT TRIGGER film_work_document_version
+AFTER INSERT OR UPDATE OR DELETE ON content.film_work_document
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION content.film_work_document_version_bump();
+
+CREATE OR REPLACE FUNCTION content.film_work_document_film_work() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM content.film_work_document WHERE id IN (SELECT id FROM old_rows);
+    ELSE
+        PERFORM content.film_work_document_refresh(ARRAY(SELECT id FROM new_rows));
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TABLE IF EXISTS content.film_work_document_deleted;
+DROP INDEX IF EXISTS content.film_work_document_updated_idx;
+"""
+
+DROP_FILM_WORK_DOCUMENT_VERSION = """
+DROP TRIGGER IF EXISTS film_work_document_version ON content.film_work_document;
+DROP FUNCTION IF EXISTS content.film_work_document_version_bump();
+DROP TABLE IF EXISTS content.film_work_document_version;
+""" + LIST_VERSION_0009.FILM_WORK_DOCUMENT_LIST_VERSION
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0009_film_work_document_list_version'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FILM_WORK_DOCUMENT_VERSION, DROP_FILM_WORK_DOCUMENT_VERSION),
+    ]
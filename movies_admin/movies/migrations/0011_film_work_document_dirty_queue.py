@@ -0,0 +1,102 @@
+# Generated by Django 4.2.11 on 2026-10-18 21:40
+
+from django.db import migrations
+
+# Загрузчик пишет связи пачками в нескольких процессах и коммитит раз в несколько пачек.
+# Пересчёт документа прямо в триггере держал бы блокировки фильмов до коммита, и процессы,
+# задевшие одни и те же фильмы разными операторами, могли бы заблокировать друг друга.
+# Поэтому в сессиях с content.film_work_document_refresh = 'deferred' триггеры только
+# записывают id фильмов в очередь, а загрузчик в конце пересобирает их короткими транзакциями
+# (schema.drain_film_work_documents). Админка и остальные сессии пересчитывают сразу, как раньше.
+FILM_WORK_DOCUMENT_DIRTY = """
+CREATE TABLE IF NOT EXISTS content.film_work_document_dirty (
+    film_work_id uuid NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS film_work_document_dirty_film_work_id_idx
+    ON content.film_work_document_dirty (film_work_id);
+
+CREATE OR REPLACE FUNCTION content.film_work_document_changed(ids uuid[]) RETURNS void AS $$
+BEGIN
+    IF current_setting('content.film_work_document_refresh', true) = 'deferred' THEN
+        INSERT INTO content.film_work_document_dirty (film_work_id) SELECT DISTINCT unnest(ids);
+    ELSE
+        PERFORM content.film_work_document_refresh(ids);
+    END IF;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# Функции триггеров из миграции 0006; {call} — что они вызывают для затронутых фильмов.
+TRIGGER_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION content.film_work_document_film_work() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM content.film_work_document WHERE id IN (SELECT id FROM old_rows);
+    ELSE
+        PERFORM content.{call}(ARRAY(SELECT id FROM new_rows));
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_document_links() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM content.{call}(ARRAY(SELECT DISTINCT film_work_id FROM new_rows));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM content.{call}(ARRAY(SELECT DISTINCT film_work_id FROM old_rows));
+    ELSE
+        PERFORM content.{call}(ARRAY(
+            SELECT film_work_id FROM new_rows UNION SELECT film_work_id FROM old_rows
+        ));
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_document_genre() RETURNS trigger AS $$
+BEGIN
+    PERFORM content.{call}(ARRAY(
+        SELECT DISTINCT gfw.film_work_id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN content.genre_film_work gfw ON gfw.genre_id = n.id
+        WHERE n.name IS DISTINCT FROM o.name
+    ));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_document_person() RETURNS trigger AS $$
+BEGIN
+    PERFORM content.{call}(ARRAY(
+        SELECT DISTINCT pfw.film_work_id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN content.person_film_work pfw ON pfw.person_id = n.id
+        WHERE n.full_name IS DISTINCT FROM o.full_name
+    ));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+DROP_FILM_WORK_DOCUMENT_DIRTY = """
+DROP FUNCTION IF EXISTS content.film_work_document_changed(uuid[]);
+DROP TABLE IF EXISTS content.film_work_document_dirty;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0010_film_work_document_version'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            FILM_WORK_DOCUMENT_DIRTY + TRIGGER_FUNCTIONS.replace('{call}', 'film_work_document_changed'),
+            TRIGGER_FUNCTIONS.replace('{call}', 'film_work_document_refresh') + DROP_FILM_WORK_DOCUMENT_DIRTY,
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.11 on 2026-10-18 22:05
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0011_film_work_document_dirty_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('full_name'), 'C'), models.F('id'), name='person_full_name_upper_c_idx'),
+        ),
+    ]
@@ -1,5 +1,10 @@
 import uuid
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Collate, Upper
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 
@@ -27,6 +32,8 @@ class Genre(UUIDMixin, TimeStampedMixin):
         db_table = "content\".\"genre"
         verbose_name = 'Жанр'
         verbose_name_plural = 'Жанры'
+        #индексы под сортировку списков в админке (навигация по курсору)
+        indexes = [models.Index(fields=['name', 'id'], name='genre_name_id_idx')]
 
 class GenreFilmWork(UUIDMixin):
     film_work = models.ForeignKey('FilmWork', on_delete=models.CASCADE)
@@ -47,6 +54,14 @@ class Person(UUIDMixin, TimeStampedMixin):
         db_table = "content\".\"person" 
         verbose_name = 'Актер'
         verbose_name_plural = 'Актеры'
+        indexes = [
+            models.Index(fields=['full_name', 'id'], name='person_full_name_id_idx'),
+            #триграммный индекс для поиска и автодополнения по части имени
+            #по UPPER(full_name), как и сравнение в icontains
+            GinIndex(OpClass(Upper('full_name'), name='gin_trgm_ops'), name='person_full_name_trgm_idx'),
+            #короткие префиксы в автодополнении: диапазон по UPPER(full_name) в побайтовом порядке
+            models.Index(Collate(Upper('full_name'), 'C'), F('id'), name='person_full_name_upper_c_idx'),
+        ]
 
 
 class PersonFilmWork(UUIDMixin):
@@ -79,6 +94,8 @@ class FilmWork(UUIDMixin, TimeStampedMixin):
     file_path = models.FileField(_('file'), blank=True, null=True, upload_to='movies/')
     genres = models.ManyToManyField(Genre, through='GenreFilmWork')
     person = models.ManyToManyField(Person, through='PersonFilmWork')
+    #заполняется триггером в базе из title и description (см. миграцию 0005)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.title 
@@ -86,4 +103,35 @@ class FilmWork(UUIDMixin, TimeStampedMixin):
     class Meta:
         db_table = "content\".\"film_work"
         verbose_name = 'Кинопроизведение'
-        verbose_name_plural = 'Кинопроизведения'
\ No newline at end of file
+        verbose_name_plural = 'Кинопроизведения'
+        indexes = [
+            models.Index(F('creation_date').desc(nulls_last=True), F('id').desc(),
+                         name='film_work_creation_date_id_idx'),
+            GinIndex(fields=['search_vector'], name='film_work_search_vector_idx'),
+        ]
+
+
+class FilmWorkDocument(models.Model):
+    #фильм с жанрами и участниками одной строкой, таблицу ведут триггеры из миграции 0006
+    id = models.UUIDField(primary_key=True)
+    title = models.TextField()
+    description = models.TextField(null=True)
+    creation_date = models.DateField(null=True)
+    rating = models.FloatField(null=True)
+    type = models.TextField()
+    genres = ArrayField(models.TextField())
+    genre_ids = ArrayField(models.UUIDField())
+    actors = ArrayField(models.TextField())
+    actor_ids = ArrayField(models.UUIDField())
+    directors = ArrayField(models.TextField())
+    director_ids = ArrayField(models.UUIDField())
+    writers = ArrayField(models.TextField())
+    writer_ids = ArrayField(models.UUIDField())
+    updated = models.DateTimeField()
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        managed = False
+        db_table = "content\".\"film_work_document"
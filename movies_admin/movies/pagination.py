@@ -0,0 +1,199 @@
+import base64
+import json
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import BooleanField, F, Func, Q, Value
+from django.utils.functional import cached_property
+
+CURSOR_VAR = 'cursor'
+# Начиная с такого размера выборки точный COUNT(*) заменяется оценкой планировщика.
+ESTIMATE_THRESHOLD = 100000
+
+
+def estimate_count(queryset) -> int | None:
+    """Оценка числа строк без COUNT(*): reltuples для всей таблицы, план запроса для выборки с фильтрами."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [f'"{queryset.model._meta.db_table}"'],
+            )
+            row = cursor.fetchone()
+        # -1 у таблиц, для которых ещё не собиралась статистика.
+        return row[0] if row and row[0] >= 0 else None
+    plan = json.loads(queryset.explain(format='json'))
+    return plan[0]['Plan']['Plan Rows']
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который на больших выборках берёт число строк из статистики Postgres."""
+
+    threshold = ESTIMATE_THRESHOLD
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < self.threshold:
+            return super().count
+        return estimate
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise IncorrectLookupParameters(f'Неверный курсор: {cursor}')
+    if not isinstance(values, list) or len(values) != size:
+        raise IncorrectLookupParameters(f'Неверный курсор: {cursor}')
+    return values
+
+
+def keyset_order_by(model, ordering: tuple[str, ...]) -> list:
+    # NULL идут в конце при любом направлении, на это опирается keyset_filters.
+    # Первичный ключ NULL не содержит, и без NULLS LAST сортировка совпадает с индексом.
+    order_by = []
+    for field in ordering:
+        name = field.lstrip('-')
+        nulls_last = None if name in ('pk', model._meta.pk.name) else True
+        expression = F(name)
+        order_by.append(
+            expression.desc(nulls_last=nulls_last) if field.startswith('-') else expression.asc(nulls_last=nulls_last)
+        )
+    return order_by
+
+
+def keyset_filters(model, ordering: tuple[str, ...], values: list) -> list:
+    """Условия для строк после values в порядке сортировки ordering, по частям.
+
+    Части идут друг за другом: сначала строки с заполненными ключами, затем хвост
+    с NULL (NULL идут в конце, см. keyset_order_by). Последние два ключа сравниваются
+    как строка (a, id) < (va, vid), такое условие индекс использует как точку старта.
+    Колонки в базе могут содержать NULL даже там, где модель их не допускает
+    (данные переносятся из SQLite), поэтому NULL учитываются у всех полей, кроме ключа.
+    Все поля сортируются в одном направлении.
+    """
+    descending = ordering[0].startswith('-')
+    if any(field.startswith('-') != descending for field in ordering):
+        raise ImproperlyConfigured(f'keyset_ordering {ordering}: все поля должны сортироваться в одном направлении')
+    names = [field.lstrip('-') for field in ordering]
+    pk_names = ('pk', model._meta.pk.name)
+    fields = [model._meta.pk if name in pk_names else model._meta.get_field(name) for name in names]
+    try:
+        values = [None if value is None else field.to_python(value) for field, value in zip(fields, values)]
+    except ValidationError:
+        raise IncorrectLookupParameters(f'Неверный курсор: {values}')
+    return _keyset_after(names, fields, values, pk_names, '<' if descending else '>')
+
+
+def _keyset_after(names: list, fields: list, values: list, pk_names: tuple, operator: str) -> list:
+    name, value = names[0], values[0]
+    if len(names) == 1:
+        return [Q(**{f"{name}__{'lt' if operator == '<' else 'gt'}": value})]
+    rest = _keyset_after(names[1:], fields[1:], values[1:], pk_names, operator)
+    if value is None:
+        # После NULL по этому полю идут только строки с тем же NULL.
+        return [Q(**{f'{name}__isnull': True}) & condition for condition in rest]
+    if len(names) == 2 and values[1] is not None:
+        conditions = [Q(row_compare(names, fields, values, operator))]
+    else:
+        conditions = [Q(**{name: value}) & condition for condition in rest]
+        conditions.append(Q(**{f"{name}__{'lt' if operator == '<' else 'gt'}": value}))
+    if name not in pk_names:
+        conditions.append(Q(**{f'{name}__isnull': True}))
+    return conditions
+
+
+def row_compare(names: list, fields: list, values: list, operator: str) -> Func:
+    """(a, b) < (va, vb) — сравнение строк, которое Postgres превращает в границу поиска по индексу."""
+    return Func(
+        Func(*[F(name) for name in names], template='(%(expressions)s)'),
+        Func(*[Value(value, output_field=field) for field, value in zip(fields, values)],
+             template='(%(expressions)s)'),
+        template='%(expressions)s', arg_joiner=f' {operator} ', output_field=BooleanField(),
+    )
+
+
+class KeysetChangeList(ChangeList):
+    """Список объектов админки с постраничным выводом по курсору вместо OFFSET.
+
+    Курсор — значения ключей сортировки последней строки страницы, поэтому любая
+    страница читается так же быстро, как первая. Если пользователь выбрал другую
+    сортировку, используется обычная постраничная навигация.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.keyset = False
+        self.next_cursor = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Ссылки фильтров и сортировки открывают первую страницу; курсор передаётся только явно.
+        return super().get_query_string(new_params, [CURSOR_VAR, *(remove or [])])
+
+    def get_results(self, request):
+        ordering = self.model_admin.keyset_ordering
+        if not ordering or ORDER_VAR in self.params or self.show_all:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        queryset = self.queryset.order_by(*keyset_order_by(self.model, ordering))
+        if self.cursor:
+            # Части выборки после курсора читаются по очереди, пока не наберётся страница.
+            rows = []
+            for condition in keyset_filters(self.model, ordering, decode_cursor(self.cursor, len(ordering))):
+                rows += queryset.filter(condition)[:self.list_per_page + 1 - len(rows)]
+                if len(rows) > self.list_per_page:
+                    break
+        else:
+            rows = list(queryset[:self.list_per_page + 1])
+        result_list = rows[:self.list_per_page]
+        if len(rows) > self.list_per_page:
+            last = result_list[-1]
+            self.next_cursor = encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
+
+        self.keyset = True
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = bool(self.cursor or self.next_cursor)
+        self.paginator = paginator
+        self.first_page_query = self.get_query_string()
+        self.next_page_query = self.get_query_string({CURSOR_VAR: self.next_cursor}) if self.next_cursor else None
+
+
+class KeysetPaginationMixin:
+    """Подключает к ModelAdmin оценку количества строк и навигацию по курсору.
+
+    keyset_ordering — уникальный набор полей сортировки, последним обычно идёт id.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    keyset_ordering = ()
+
+    def get_ordering(self, request):
+        return self.keyset_ordering or super().get_ordering(request)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,43 @@
+from functools import reduce
+from operator import or_
+from uuid import UUID
+
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Q
+from django.db.models.functions import Upper
+
+# Конфигурации полнотекстового поиска, по которым триггер строит search_vector.
+SEARCH_CONFIGS = ('russian', 'english')
+
+
+class PostgresSearchMixin:
+    """Поиск в админке по индексам Postgres вместо ILIKE '%...%' по всем search_fields.
+
+    Строка, похожая на UUID, ищется точным совпадением по первичному ключу.
+    search_vector_field — поле tsvector с GIN-индексом для полнотекстового поиска,
+    trigram_search_field — поле с триграммным индексом по UPPER(поле) для поиска по части слова и с опечатками.
+    search_fields по-прежнему нужен, чтобы админка показывала строку поиска.
+    """
+
+    search_vector_field = None
+    trigram_search_field = None
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        try:
+            return queryset.filter(pk=UUID(term)), False
+        except ValueError:
+            pass
+
+        if self.search_vector_field:
+            query = reduce(or_, (SearchQuery(term, config=config, search_type='websearch') for config in SEARCH_CONFIGS))
+            return queryset.filter(**{self.search_vector_field: query}), False
+        if self.trigram_search_field:
+            # Оба условия по UPPER(поле), под триграммный индекс по этому выражению.
+            field = self.trigram_search_field
+            condition = Q(**{f'{field}__icontains': term}) | TrigramSimilar(Upper(field), term.upper())
+            return queryset.filter(condition), False
+        return super().get_search_results(request, queryset, search_term)
@@ -0,0 +1,8 @@
+from django.contrib import admin
+
+from .autocomplete import CachedAutocompleteJsonView
+
+
+class MoviesAdminSite(admin.AdminSite):
+    def autocomplete_view(self, request):
+        return CachedAutocompleteJsonView.as_view(admin_site=self)(request)
@@ -1,3 +1,52 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork
+
+
+class FilmWorkAdminQueriesTest(TestCase):
+    """Число запросов страниц фильма в админке не зависит от числа жанров и участников."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.film = FilmWork.objects.create(title='Фильм', creation_date=datetime.date(2020, 1, 1),
+                                           type='movie', rating=7.5)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def add_links(self, count):
+        start = Genre.objects.count()
+        for i in range(start, start + count):
+            genre = Genre.objects.create(name=f'Жанр {i}')
+            person = Person.objects.create(full_name=f'Актер {i}')
+            GenreFilmWork.objects.create(film_work=self.film, genre=genre)
+            PersonFilmWork.objects.create(film_work=self.film, person=person)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_change_page_queries_do_not_grow(self):
+        url = reverse('admin:movies_filmwork_change', args=[self.film.pk])
+        self.add_links(1)
+        expected = self.count_queries(url)
+        self.add_links(10)
+        self.assertEqual(self.count_queries(url), expected)
 
-# Create your tests here.
+    def test_changelist_queries_do_not_grow(self):
+        url = reverse('admin:movies_filmwork_changelist')
+        self.add_links(1)
+        expected = self.count_queries(url)
+        self.add_links(10)
+        response = self.client.get(url)
+        self.assertContains(response, 'Жанр 0, Жанр 1')
+        self.assertEqual(self.count_queries(url), expected)
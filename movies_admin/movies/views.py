@@ -1,3 +1,201 @@
-from django.shortcuts import render
+import json
 
-# Create your views here.
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import condition
+
+from .api_cache import detail_cache_key, list_cache_key, movie_last_modified, movies_version
+from .models import FilmWorkDocument
+from .pagination import (CURSOR_VAR, EstimatedCountPaginator, decode_cursor, encode_cursor, keyset_filters,
+                         keyset_order_by)
+
+PAGE_SIZE = 50
+MOVIE_FIELDS = ('id', 'title', 'description', 'creation_date', 'rating', 'type',
+                'genres', 'actors', 'directors', 'writers')
+# Тот же порядок, что у индекса film_work_document_creation_date_id_idx.
+MOVIES_ORDERING = ('-creation_date', '-id')
+
+# Фильм с жанрами и участниками по ролям читается из content.film_work_document одной строкой:
+# массивы там уже собраны триггерами, так что страница — проход по индексу, карточка — поиск по ключу.
+MOVIE_SQL = """
+SELECT id, title, description, creation_date, rating, type, genres, actors, directors, writers
+FROM content.film_work_document
+WHERE id = %(id)s
+"""
+
+
+def fetch_movies(sql: str, params: dict) -> list[dict]:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column.name for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def movies_queryset():
+    return (FilmWorkDocument.objects.order_by(*keyset_order_by(FilmWorkDocument, MOVIES_ORDERING))
+            .values(*MOVIE_FIELDS))
+
+
+def movies_count() -> int:
+    #без COUNT(*) по всему каталогу: на больших таблицах берётся оценка планировщика, как в админке
+    return EstimatedCountPaginator(FilmWorkDocument.objects.all(), PAGE_SIZE).count
+
+
+def cursor_after(rows: list[dict]) -> str:
+    return encode_cursor([rows[-1]['creation_date'], rows[-1]['id']])
+
+
+def json_response(body: str) -> HttpResponse:
+    return HttpResponse(body, content_type='application/json')
+
+
+def request_cursor(request) -> list | None:
+    cursor = request.GET.get(CURSOR_VAR)
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor, len(MOVIES_ORDERING))
+    except IncorrectLookupParameters:
+        raise Http404(f'Неверный курсор: {cursor}')
+
+
+def list_position(request) -> str:
+    #страница или курсор в виде, пригодном для ETag и ключа кэша: сырые параметры туда не попадают
+    cursor = request_cursor(request)
+    if cursor is not None:
+        return f'cursor-{encode_cursor(cursor)}'
+    return f'page-{page_number(request)}'
+
+
+def page_number(request) -> int:
+    page = request.GET.get('page', 1)
+    try:
+        page = int(page)
+    except ValueError:
+        raise Http404(f'Неверный номер страницы: {page}')
+    if page < 1:
+        raise Http404(f'Неверный номер страницы: {page}')
+    return page
+
+
+def request_version(request) -> tuple:
+    #одна версия на запрос: по ней считаются ETag, Last-Modified и ключ кэша
+    if not hasattr(request, '_movies_version'):
+        request._movies_version = movies_version()
+    return request._movies_version
+
+
+def list_etag(request, *args, **kwargs):
+    version, _ = request_version(request)
+    return f'"{version}-{list_position(request)}"'
+
+
+def list_last_modified(request, *args, **kwargs):
+    _, modified = request_version(request)
+    return modified
+
+
+def request_last_modified(request, pk):
+    if not hasattr(request, '_movie_last_modified'):
+        request._movie_last_modified = movie_last_modified(pk)
+    return request._movie_last_modified
+
+
+def detail_etag(request, *args, **kwargs):
+    last_modified = request_last_modified(request, kwargs['pk'])
+    return f'"{last_modified.timestamp()}"' if last_modified else None
+
+
+def detail_last_modified(request, *args, **kwargs):
+    return request_last_modified(request, kwargs['pk'])
+
+
+@method_decorator(condition(etag_func=list_etag, last_modified_func=list_last_modified), name='get')
+class MoviesListApi(View):
+    """Страница фильмов: ?page=N или ?cursor= из next_cursor предыдущей страницы.
+
+    Курсор — значения сортировки последней строки, такая страница читается по индексу
+    с нужного места, без OFFSET. count на больших каталогах — оценка планировщика.
+    На 304 ответ не собирается, готовые страницы берутся из кэша.
+
+    Версия списка — счётчик в базе, который растёт с каждым коммитом, изменившим документы,
+    поэтому она верна и для правок в обход ORM (загрузчик, другие процессы).
+    """
+
+    http_method_names = ['get']
+    paginate_by = PAGE_SIZE
+
+    def get(self, request, *args, **kwargs):
+        version, _ = request_version(request)
+        key = list_cache_key(version, list_position(request))
+        body = cache.get(key)
+        if body is None:
+            cursor = request_cursor(request)
+            data = self.get_page(page_number(request)) if cursor is None else self.get_cursor_page(cursor)
+            body = json.dumps(data, cls=DjangoJSONEncoder)
+            cache.set(key, body)
+        return json_response(body)
+
+    def get_page(self, page: int) -> dict:
+        offset = (page - 1) * self.paginate_by
+        #лишняя строка показывает, есть ли следующая страница, без точного подсчёта
+        rows = list(movies_queryset()[offset:offset + self.paginate_by + 1])
+        if not rows and page > 1:
+            raise Http404(f'Страница {page} не найдена')
+        return self.page_data(rows, page)
+
+    def get_cursor_page(self, cursor: list) -> dict:
+        try:
+            conditions = keyset_filters(FilmWorkDocument, MOVIES_ORDERING, cursor)
+        except IncorrectLookupParameters:
+            raise Http404(f'Неверный курсор: {cursor}')
+        rows = []
+        for part in conditions:
+            rows += movies_queryset().filter(part)[:self.paginate_by + 1 - len(rows)]
+            if len(rows) > self.paginate_by:
+                break
+        return self.page_data(rows, None)
+
+    def page_data(self, rows: list[dict], page: int | None) -> dict:
+        has_next = len(rows) > self.paginate_by
+        rows = rows[:self.paginate_by]
+        count = movies_count()
+        total_pages = max((count + self.paginate_by - 1) // self.paginate_by, 1)
+        if page is not None:
+            #оценка может отставать от данных, номер текущей страницы её уточняет
+            total_pages = max(total_pages, page + 1 if has_next else page)
+        return {
+            'count': count,
+            'total_pages': total_pages,
+            'prev': page - 1 if page and page > 1 else None,
+            'next': page + 1 if page and has_next else None,
+            'next_cursor': cursor_after(rows) if has_next else None,
+            'results': rows,
+        }
+
+
+@method_decorator(condition(etag_func=detail_etag, last_modified_func=detail_last_modified), name='get')
+class MoviesDetailApi(View):
+    """Карточка фильма. Кэш сверяется со временем изменения из базы, поэтому верен при любых правках данных."""
+
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        pk = kwargs['pk']
+        last_modified = request_last_modified(request, pk)
+        if last_modified is None:
+            raise Http404('Фильм не найден')
+        cached = cache.get(detail_cache_key(pk))
+        if cached is not None and cached[0] == last_modified:
+            return json_response(cached[1])
+        rows = fetch_movies(MOVIE_SQL, {'id': pk})
+        if not rows:
+            raise Http404('Фильм не найден')
+        body = json.dumps(rows[0], cls=DjangoJSONEncoder)
+        cache.set(detail_cache_key(pk), (last_modified, body))
+        return json_response(body)
@@ -0,0 +1,88 @@
+"""Микробенчмарк стадии transform: датаклассы против собранных конвертеров строк.
+
+Запуск: python bench_transform.py --rows 200000
+"""
+import argparse
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+
+from psycopg.adapt import PyFormat, Transformer
+
+from load_data import PASSTHROUGH_CONVERTERS, ROW_CONVERTERS, SQLiteLoader, compile_row_converter
+
+TIMESTAMP = '2021-06-16 20:14:09.221855+00'
+
+
+def make_source(rows: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(':memory:')
+    conn.execute(
+        'CREATE TABLE film_work (id TEXT PRIMARY KEY, title TEXT, description TEXT, creation_date DATE, '
+        'file_path TEXT, rating FLOAT, type TEXT, created_at timestamp, updated_at timestamp);'
+    )
+    conn.executemany(
+        'INSERT INTO film_work VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);',
+        (
+            (str(uuid.uuid4()), f'Film {i}', None if i % 3 else f'About {i}', None, None,
+             i % 100 / 10, 'movie', TIMESTAMP, TIMESTAMP)
+            for i in range(rows)
+        ),
+    )
+    return conn
+
+
+def dataclass_path(conn: sqlite3.Connection, columns: str, dataclass_type) -> int:
+    # Прежний путь: sqlite3.Row -> dict -> датакласс -> dict параметров через getattr.
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    cursor.execute(f'SELECT {columns} FROM film_work;')
+    count = 0
+    while batch := cursor.fetchmany(1000):
+        for row in batch:
+            record = dataclass_type(**dict(row))
+            params = {field: getattr(record, field) for field in record.__dict__}
+            count += len(params) > 0
+    return count
+
+
+def converter_path(conn: sqlite3.Connection, columns: str, converters: dict = ROW_CONVERTERS,
+                   dump: bool = False) -> int:
+    # dump=True дополнительно сериализует строку так же, как это делает COPY в текстовом формате.
+    convert = compile_row_converter(converters['film_work'])
+    transformer = Transformer()
+    formats = [PyFormat.TEXT] * len(converters['film_work'])
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT {columns} FROM film_work;')
+    count = 0
+    while batch := cursor.fetchmany(1000):
+        for row in batch:
+            values = convert(row)
+            if dump:
+                transformer.dump_sequence(values, formats)
+            count += 1
+    return count
+
+
+def measure(name: str, func, *args) -> float:
+    started = time.perf_counter()
+    rows = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f'{name:<20} {rows} строк за {elapsed:.2f} с — {rows / elapsed:,.0f} строк/с')
+    return rows / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    with closing(make_source(args.rows)) as conn:
+        columns, dataclass_type = SQLiteLoader(conn).TABLE_CONFIG['film_work']
+        before = measure('dataclass', dataclass_path, conn, columns, dataclass_type)
+        after = measure('converter', converter_path, conn, columns)
+        passthrough = measure('passthrough', converter_path, conn, columns, PASSTHROUGH_CONVERTERS)
+        dumped = measure('converter + COPY', converter_path, conn, columns, ROW_CONVERTERS, True)
+        dumped_passthrough = measure('passthrough + COPY', converter_path, conn, columns, PASSTHROUGH_CONVERTERS, True)
+    print(f'Ускорение: {after / before:.1f}x, с --passthrough {passthrough / before:.1f}x')
+    print(f'С сериализацией для COPY --passthrough быстрее в {dumped_passthrough / dumped:.1f}x')
@@ -0,0 +1,253 @@
+"""Бенчмарк миграции SQLite -> PostgreSQL.
+
+Для каждого масштаба синтетической базы (generate_sqlite.py) и каждого размера
+пачки запускает load_data.py и записывает в JSON скорость по таблицам,
+разбивку времени по стадиям extract/transform/load, пиковый RSS и объём WAL.
+
+Перед каждым замером таблицы content очищаются, поэтому база нужна отдельная:
+с --temp-cluster поднимается временный кластер через initdb/pg_ctl, с --dsn
+берётся указанная база. База из переменных окружения DB_* (обычно рабочая)
+используется только с явным --i-know-this-truncates.
+
+Сравнение с прошлым результатом:
+    python benchmark.py --scales 1 10 --output new.json --compare old.json --threshold 0.1
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from dataclasses import asdict
+
+import psycopg
+from dotenv import load_dotenv
+from psycopg.conninfo import conninfo_to_dict
+
+import load_data
+from generate_sqlite import generate
+
+load_dotenv()
+
+DDL_PATH = os.path.join(os.path.dirname(__file__), '..', 'schema_design', 'movies_database.ddl')
+CONTENT_TABLES = ('person_film_work', 'genre_film_work', 'film_work', 'genre', 'person')
+
+
+class TempCluster:
+    """Временный кластер Postgres в отдельном каталоге на свободном порту."""
+
+    def __init__(self, pg_bin: str | None = None):
+        self.pg_bin = pg_bin
+        self.data_dir = tempfile.mkdtemp(prefix='movies_bench_')
+        with closing(socket.socket()) as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+
+    def _binary(self, name: str) -> str:
+        return os.path.join(self.pg_bin, name) if self.pg_bin else name
+
+    def start(self) -> dict:
+        subprocess.run(
+            [self._binary('initdb'), '-D', self.data_dir, '-U', 'postgres', '-A', 'trust', '--no-sync'],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        subprocess.run(
+            [self._binary('pg_ctl'), '-D', self.data_dir, '-l', os.path.join(self.data_dir, 'server.log'),
+             '-o', f'-p {self.port} -k {self.data_dir}', '-w', 'start'],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        dsl = {'dbname': 'postgres', 'user': 'postgres', 'host': '127.0.0.1', 'port': self.port}
+        with closing(psycopg.connect(**dsl, autocommit=True)) as conn:
+            conn.execute('CREATE DATABASE movies_bench')
+        return {**dsl, 'dbname': 'movies_bench'}
+
+    def stop(self):
+        subprocess.run(
+            [self._binary('pg_ctl'), '-D', self.data_dir, '-m', 'fast', 'stop'],
+            check=False, stdout=subprocess.DEVNULL,
+        )
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+def prepare_schema(dsl: dict):
+    with open(DDL_PATH, encoding='utf-8') as ddl, closing(psycopg.connect(**dsl, autocommit=True)) as conn:
+        conn.execute(ddl.read())
+        # file_path добавляет миграция Django, в DDL этой колонки нет.
+        conn.execute('ALTER TABLE content.film_work ADD COLUMN IF NOT EXISTS file_path TEXT')
+
+
+def reset_database(dsl: dict):
+    with closing(psycopg.connect(**dsl, autocommit=True)) as conn:
+        conn.execute(f"TRUNCATE {', '.join(f'content.{t}' for t in CONTENT_TABLES)}")
+        conn.execute(f'DROP SCHEMA IF EXISTS {load_data.CheckpointStore.SCHEMA} CASCADE')
+        conn.execute('CHECKPOINT')
+
+
+def current_wal_lsn(dsl: dict) -> str:
+    with closing(psycopg.connect(**dsl)) as conn:
+        return conn.execute('SELECT pg_current_wal_lsn()::text').fetchone()[0]
+
+
+def wal_bytes_since(dsl: dict, lsn: str) -> int:
+    with closing(psycopg.connect(**dsl)) as conn:
+        return int(conn.execute('SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s::pg_lsn)', [lsn]).fetchone()[0])
+
+
+def run_migration(sqlite_path: str, dsl: dict, options: load_data.LoadOptions, workers: int) -> dict:
+    # Выполняется в отдельном процессе, чтобы пиковый RSS относился только к миграции.
+    load_data.logger.setLevel(logging.WARNING)
+    started = time.perf_counter()
+    if workers > 1:
+        stats = load_data.load_parallel(sqlite_path, dsl, workers, options)
+    else:
+        with closing(load_data.connect_sqlite_readonly(sqlite_path)) as sqlite_conn, \
+                load_data.connect_postgres(dsl) as pg_conn:
+            stats = load_data.load_from_sqlite(sqlite_conn, pg_conn, options)
+    elapsed = time.perf_counter() - started
+    peak_rss_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return {'seconds': elapsed, 'peak_rss_mb': peak_rss_kb / 1024, 'tables': [asdict(s) for s in stats]}
+
+
+def benchmark(dsl: dict, work_dir: str, scales: list[float], batch_sizes: list[int], mode: str,
+              workers: int, passthrough: bool, seed: int, dirty_ratio: float = 0) -> list[dict]:
+    runs = []
+    for scale in scales:
+        sqlite_path = os.path.join(work_dir, f'bench_x{scale:g}_seed{seed}_dirty{dirty_ratio:g}.sqlite')
+        if not os.path.exists(sqlite_path):
+            generate(sqlite_path, scale=scale, seed=seed, dirty_ratio=dirty_ratio)
+        for batch_size in batch_sizes:
+            reset_database(dsl)
+            options = load_data.LoadOptions(mode=mode, batch_size=batch_size, passthrough=passthrough)
+            lsn = current_wal_lsn(dsl)
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result = pool.submit(run_migration, sqlite_path, dsl, options, workers).result()
+            rows = sum(table['rows'] for table in result['tables'])
+            run = {
+                'scale': scale,
+                'batch_size': batch_size,
+                'mode': mode,
+                'workers': workers,
+                'passthrough': passthrough,
+                'dirty_ratio': dirty_ratio,
+                'rows': rows,
+                'seconds': result['seconds'],
+                'rows_per_second': rows / result['seconds'] if result['seconds'] else 0.0,
+                'peak_rss_mb': result['peak_rss_mb'],
+                'wal_bytes': wal_bytes_since(dsl, lsn),
+                'tables': {
+                    table['table_name']: {
+                        **{k: v for k, v in table.items() if k != 'table_name'},
+                        'rows_per_second': table['rows'] / table['total_seconds'] if table['total_seconds'] else 0.0,
+                    }
+                    for table in result['tables']
+                },
+            }
+            print(f"x{scale:g} batch={batch_size}: {rows} строк за {run['seconds']:.1f} с, "
+                  f"{run['rows_per_second']:,.0f} строк/с, RSS {run['peak_rss_mb']:.0f} МБ, "
+                  f"WAL {run['wal_bytes'] / 1024 / 1024:.1f} МБ")
+            runs.append(run)
+    return runs
+
+
+def run_key(run: dict) -> tuple:
+    return (run['scale'], run['batch_size'], run['mode'], run['workers'], run.get('passthrough', False),
+            run.get('dirty_ratio', 0))
+
+
+def compare(runs: list[dict], baseline_path: str, threshold: float) -> list[str]:
+    """Возвращает описания запусков, где скорость упала больше чем на threshold."""
+    with open(baseline_path, encoding='utf-8') as baseline_file:
+        baseline = {run_key(run): run for run in json.load(baseline_file)['runs']}
+    regressions = []
+    for run in runs:
+        old = baseline.get(run_key(run))
+        if not old or not old['rows_per_second']:
+            continue
+        change = run['rows_per_second'] / old['rows_per_second'] - 1
+        line = (f"x{run['scale']:g} batch={run['batch_size']}: "
+                f"{old['rows_per_second']:,.0f} -> {run['rows_per_second']:,.0f} строк/с ({change:+.1%})")
+        print(line)
+        if change < -threshold:
+            regressions.append(line)
+    return regressions
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], check=True, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Бенчмарк миграции SQLite -> PostgreSQL')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--mode', choices=load_data.SAVE_MODES, default='auto')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--passthrough', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    # Отброшенные строки фильмов и участников оставляют связи без родителя, и загрузка
+    # падает на внешних ключах, поэтому для замеров скорости база по умолчанию чистая.
+    parser.add_argument('--dirty-ratio', type=float, default=0,
+                        help='доля испорченных строк в сгенерированной базе (см. generate_sqlite.py)')
+    parser.add_argument('--work-dir', default=tempfile.gettempdir(), help='где хранить сгенерированные базы SQLite')
+    parser.add_argument('--temp-cluster', action='store_true', help='поднять временный кластер Postgres')
+    parser.add_argument('--pg-bin', default=None, help='каталог с initdb и pg_ctl')
+    parser.add_argument('--dsn', default=None,
+                        help='строка подключения к отдельной базе для замеров, её таблицы content очищаются')
+    parser.add_argument('--i-know-this-truncates', action='store_true',
+                        help='разрешить замеры на базе из переменных DB_*: её таблицы content будут очищены')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', default=None, help='JSON прошлого запуска для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.1, help='допустимое падение скорости, доля')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if not (args.temp_cluster or args.dsn or args.i_know_this_truncates):
+        raise SystemExit('Бенчмарк очищает таблицы content и схему '
+                         f'{load_data.CheckpointStore.SCHEMA}. Укажите --temp-cluster, --dsn отдельной базы '
+                         'или --i-know-this-truncates, чтобы работать с базой из переменных DB_*')
+    cluster = TempCluster(args.pg_bin) if args.temp_cluster else None
+    try:
+        if cluster:
+            dsl = cluster.start()
+            prepare_schema(dsl)
+        elif args.dsn:
+            dsl = conninfo_to_dict(args.dsn)
+        else:
+            dsl = {'dbname': os.environ.get('DB_NAME'), 'user': os.environ.get('DB_USER'),
+                   'password': os.environ.get('DB_PASSWORD'), 'host': os.environ.get('DB_HOST', '127.0.0.1'),
+                   'port': os.environ.get('DB_PORT', 5432)}
+        runs = benchmark(dsl, args.work_dir, args.scales, args.batch_sizes, args.mode,
+                         args.workers, args.passthrough, args.seed, args.dirty_ratio)
+    finally:
+        if cluster:
+            cluster.stop()
+
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump({'revision': git_revision(), 'created': time.time(), 'runs': runs}, output, indent=2)
+    print(f'Результаты записаны в {args.output}')
+
+    if args.compare:
+        regressions = compare(runs, args.compare, args.threshold)
+        if regressions:
+            print(f'Падение скорости больше {args.threshold:.0%}:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
@@ -0,0 +1,196 @@
+"""Генератор синтетической SQLite-базы в схеме, которую читает load_data.py.
+
+Объём задаётся коэффициентом масштаба (1x примерно равен исходному db.sqlite),
+а содержимое полностью определяется seed, поэтому базы 1x/10x/100x воспроизводимы.
+Часть строк намеренно «грязная»: пустые описания, повторы пар в таблицах связей
+и даты в неверном формате.
+
+Запуск: python generate_sqlite.py --scale 10 --seed 42 --output db_x10.sqlite
+"""
+import argparse
+import os
+import random
+import sqlite3
+import uuid
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+# Объёмы при --scale 1, близкие к исходной базе.
+BASE_VOLUMES = {
+    'film_work': 1000,
+    'genre': 26,
+    'person': 4200,
+}
+GENRES_PER_FILM = (1, 4)
+PERSONS_PER_FILM = (2, 10)
+ROLES = ('actor', 'director', 'writer')
+TYPES = ('movie', 'tv_show')
+WORDS = (
+    'star', 'war', 'night', 'city', 'dark', 'love', 'return', 'last', 'king', 'river', 'storm',
+    'secret', 'game', 'road', 'ghost', 'summer', 'winter', 'dream', 'fire', 'stone', 'empire',
+)
+FIRST_NAMES = ('Anna', 'Boris', 'Clara', 'Denis', 'Elena', 'Fedor', 'Galina', 'Igor', 'Maria', 'Oleg')
+LAST_NAMES = ('Ivanov', 'Smith', 'Petrova', 'Brown', 'Sokolov', 'Miller', 'Orlova', 'Davis', 'Kuznetsov')
+BATCH_SIZE = 10000
+
+SCHEMA = """
+CREATE TABLE film_work (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    creation_date DATE,
+    file_path TEXT,
+    rating FLOAT,
+    type TEXT NOT NULL,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE genre (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE person (
+    id TEXT PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE genre_film_work (
+    id TEXT PRIMARY KEY,
+    film_work_id TEXT NOT NULL,
+    genre_id TEXT NOT NULL,
+    created_at timestamp with time zone
+);
+CREATE TABLE person_film_work (
+    id TEXT PRIMARY KEY,
+    film_work_id TEXT NOT NULL,
+    person_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at timestamp with time zone
+);
+"""
+
+EPOCH = datetime(2021, 6, 16, tzinfo=timezone.utc)
+
+
+class SyntheticSource:
+    def __init__(self, seed: int, scale: float, dirty_ratio: float):
+        self.rng = random.Random(seed)
+        self.dirty_ratio = dirty_ratio
+        self.volumes = {table: max(1, int(count * scale)) for table, count in BASE_VOLUMES.items()}
+        self.ids = {table: [] for table in self.volumes}
+
+    def make_id(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def is_dirty(self) -> bool:
+        return self.rng.random() < self.dirty_ratio
+
+    def timestamp(self) -> str:
+        moment = EPOCH + timedelta(
+            seconds=self.rng.randrange(365 * 24 * 3600), microseconds=self.rng.randrange(10 ** 6),
+        )
+        if self.is_dirty():
+            # Дата в формате, который не разбирает datetime.fromisoformat.
+            return moment.strftime('%d.%m.%Y %H:%M')
+        return moment.strftime('%Y-%m-%d %H:%M:%S.%f') + '+00'
+
+    def text(self, words: int) -> str:
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def description(self) -> str | None:
+        # Примерно у пятой части записей описания нет, как в исходной базе.
+        return None if self.rng.random() < 0.2 else self.text(12)
+
+    def film_works(self):
+        for _ in range(self.volumes['film_work']):
+            film_id = self.make_id()
+            self.ids['film_work'].append(film_id)
+            created = self.timestamp()
+            creation_date = None if self.rng.random() < 0.3 else \
+                f'{self.rng.randrange(1950, 2021)}-{self.rng.randrange(1, 13):02}-{self.rng.randrange(1, 29):02}'
+            rating = None if self.rng.random() < 0.05 else round(self.rng.uniform(0, 10), 1)
+            yield (film_id, self.text(3), self.description(), creation_date, None, rating,
+                   self.rng.choice(TYPES), created, created)
+
+    def genres(self):
+        for i in range(self.volumes['genre']):
+            genre_id = self.make_id()
+            self.ids['genre'].append(genre_id)
+            created = self.timestamp()
+            yield genre_id, f'{self.text(1)} {i}', self.description(), created, created
+
+    def persons(self):
+        for _ in range(self.volumes['person']):
+            person_id = self.make_id()
+            self.ids['person'].append(person_id)
+            created = self.timestamp()
+            full_name = f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+            yield person_id, full_name, created, created
+
+    def links(self, parent: str, per_film: tuple[int, int], with_role: bool):
+        parents = self.ids[parent]
+        for film_id in self.ids['film_work']:
+            count = min(self.rng.randint(*per_film), len(parents))
+            for parent_id in self.rng.sample(parents, count):
+                row = (self.make_id(), film_id, parent_id) + ((self.rng.choice(ROLES),) if with_role else ())
+                yield row + (self.timestamp(),)
+                if self.is_dirty():
+                    # Та же пара с другим id — такие повторы отсекает ON CONFLICT.
+                    yield (self.make_id(),) + row[1:] + (self.timestamp(),)
+
+
+def insert(conn: sqlite3.Connection, table_name: str, rows) -> int:
+    placeholders = None
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            placeholders = placeholders or ', '.join('?' * len(row))
+            conn.executemany(f'INSERT INTO {table_name} VALUES ({placeholders})', batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        placeholders = placeholders or ', '.join('?' * len(batch[0]))
+        conn.executemany(f'INSERT INTO {table_name} VALUES ({placeholders})', batch)
+        count += len(batch)
+    return count
+
+
+def generate(output: str, scale: float = 1, seed: int = 0, dirty_ratio: float = 0.01) -> dict[str, int]:
+    if os.path.exists(output):
+        os.remove(output)
+    generator = SyntheticSource(seed, scale, dirty_ratio)
+    counts = {}
+    with closing(sqlite3.connect(output)) as conn:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.executescript(SCHEMA)
+        counts['film_work'] = insert(conn, 'film_work', generator.film_works())
+        counts['genre'] = insert(conn, 'genre', generator.genres())
+        counts['person'] = insert(conn, 'person', generator.persons())
+        counts['genre_film_work'] = insert(
+            conn, 'genre_film_work', generator.links('genre', GENRES_PER_FILM, with_role=False),
+        )
+        counts['person_film_work'] = insert(
+            conn, 'person_film_work', generator.links('person', PERSONS_PER_FILM, with_role=True),
+        )
+        conn.commit()
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Генерация синтетической SQLite-базы для бенчмарков миграции')
+    parser.add_argument('--output', default='db_synthetic.sqlite')
+    parser.add_argument('--scale', type=float, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dirty-ratio', type=float, default=0.01,
+                        help='доля строк с неверными датами и повторами пар в таблицах связей')
+    args = parser.parse_args()
+
+    for table_name, count in generate(args.output, args.scale, args.seed, args.dirty_ratio).items():
+        print(f'{table_name}: {count}')
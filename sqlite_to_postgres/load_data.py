@@ -2,15 +2,30 @@ import sqlite3
 import psycopg
 import os
 import logging
+import argparse
+import gc
+import json
+import re
+import resource
+import time
 from psycopg import ClientCursor, connection as _connection
 from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timezone
 from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, astuple
 from typing import Generator
 from uuid import UUID
 
+from metrics import MigrationMetrics, PROFILERS, part_textfile, profiled
+from schema import (
+    DOCUMENT_REFRESH_SETTING, INDEX_WORKERS, MAINTENANCE_WORK_MEM, OLD_SUFFIX, SHADOW_SUFFIX,
+    create_bare_tables, create_shadow_tables, drain_film_work_documents, finish_bulk_load,
+    refresh_film_work_documents, swap_tables,
+)
+
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,6 +40,34 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Режимы записи в Postgres: построчный INSERT, COPY через временную таблицу
+# или автоматический выбор по количеству записей в таблице.
+SAVE_MODES = ('auto', 'insert', 'copy')
+COPY_THRESHOLD = 10000
+BATCH_SIZE = 100
+# Таблицы больше CHUNK_ROWS записей в параллельном режиме читаются диапазонами rowid.
+CHUNK_ROWS = 500000
+# Раз в сколько пачек коммитить данные вместе с чекпоинтом.
+COMMIT_EVERY = 10
+
+# Таблицы внутри одного этапа не зависят друг от друга и могут грузиться
+# параллельно; таблицы связей ждут загрузки родительских таблиц.
+TABLE_STAGES = (
+    ('person', 'genre', 'film_work'),
+    ('genre_film_work', 'person_film_work'),
+)
+
+
+def current_rss_mb() -> float:
+    """Текущий RSS процесса в мегабайтах."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * resource.getpagesize() / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        # Вне Linux доступен только пиковый RSS (в килобайтах).
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
 @dataclass
 class FilmWork:
     id: UUID
@@ -124,12 +167,153 @@ class PersonFilmWork:
          self.film_work_id = UUID(self.film_work_id)  
         if isinstance(self.person_id, str):
          self.person_id = UUID(self.person_id)
+        if isinstance(self.created_at, str):
+         self.created_at = datetime.fromisoformat(self.created_at)
+
+
+def to_uuid(value):
+    return UUID(value) if value.__class__ is str else value
+
+
+def to_text(value):
+    if value is None:
+        return ''
+    return value if value.__class__ is str else str(value)
+
+
+def to_datetime(value):
+    return datetime.fromisoformat(value) if value.__class__ is str else value
+
+
+def iso_timestamp(value) -> str | None:
+    """Момент времени в UTC в одном текстовом формате; None, если значение не разбирается.
+
+    В SQLite даты — строки разного вида, и сравнивать их как текст нельзя: строка
+    вроде '31.12.2021 10:00' оказалась бы позже любой даты ISO. Строки в этом формате
+    сравниваются так же, как моменты времени. Время без пояса считается UTC.
+    """
+    try:
+        moment = to_datetime(value)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(moment, datetime):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')
+
+
+# Преобразования колонок из TABLE_CONFIG, повторяющие __post_init__ датаклассов
+# (None — значение передаётся как есть).
+ROW_CONVERTERS = {
+    'person': (to_uuid, None, to_datetime, to_datetime),
+    'genre': (to_uuid, None, to_text, to_datetime, to_datetime),
+    'film_work': (to_uuid, None, to_text, None, to_text, None, to_text, to_datetime, to_datetime),
+    'genre_film_work': (to_uuid, to_uuid, to_uuid, to_datetime),
+    'person_film_work': (to_uuid, to_uuid, to_uuid, None, to_datetime),
+}
+
+
+UUID_RE = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+TIMESTAMP_RE = re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d{1,6})?([+-]\d{2}(:?\d{2})?|Z)?')
+
+
+def check_uuid(value):
+    # Строка в каноническом виде уходит в Postgres как есть, остальное разбирается полностью.
+    if value.__class__ is str and UUID_RE.fullmatch(value):
+        return value
+    return to_uuid(value)
+
+
+def check_datetime(value):
+    if value.__class__ is str and TIMESTAMP_RE.fullmatch(value):
+        return value
+    return to_datetime(value)
+
+
+# Режим --passthrough: вместо разбора UUID и дат только проверяем формат строки.
+PASSTHROUGH_CHECKS = {to_uuid: check_uuid, to_datetime: check_datetime}
+PASSTHROUGH_CONVERTERS = {
+    table_name: tuple(PASSTHROUGH_CHECKS.get(converter, converter) for converter in converters)
+    for table_name, converters in ROW_CONVERTERS.items()
+}
+
+
+def compile_row_converter(converters: tuple, offset: int = 0):
+    """Собирает функцию tuple -> tuple без циклов и проверок на каждую колонку.
+
+    offset — сколько служебных колонок (например, rowid) пропустить в начале строки.
+    """
+    namespace = {}
+    items = []
+    for index, converter in enumerate(converters):
+        if converter is None:
+            items.append(f'row[{index + offset}]')
+        else:
+            namespace[f'convert_{index}'] = converter
+            items.append(f'convert_{index}(row[{index + offset}])')
+    exec(f"def convert(row):\n    return ({', '.join(items)},)", namespace)
+    return namespace['convert']
+
+
+@dataclass
+class LoadOptions:
+    mode: str = 'auto'
+    copy_threshold: int = COPY_THRESHOLD
+    batch_size: int = BATCH_SIZE
+    memory_limit_mb: float | None = None
+    commit_every: int = COMMIT_EVERY
+    resume: bool = False
+    delta: bool = False
+    passthrough: bool = False
+    metrics_jsonl: str | None = None
+    prometheus_textfile: str | None = None
+    profile: str | None = None
+    profiler: str = 'cprofile'
+    dead_letter: str | None = None
+    # Суффикс таблиц, в которые пишутся данные: '__shadow' при перезаливке с подменой.
+    table_suffix: str = ''
+
+
+@dataclass
+class TableStats:
+    """Итоги переноса таблицы: строки и время по стадиям extract/transform/load в секундах."""
+    table_name: str
+    rows: int = 0
+    rejected: int = 0
+    extract_seconds: float = 0.0
+    transform_seconds: float = 0.0
+    load_seconds: float = 0.0
+    total_seconds: float = 0.0
+    # Начало и конец переноса по часам (time.time()), 0 — таблица не переносилась.
+    started: float = 0.0
+    finished: float = 0.0
+
+    def merge(self, other: 'TableStats'):
+        # Время стадий у частей одной таблицы складывается, то есть это суммарное время процессов.
+        # total_seconds — от начала первой части до конца последней: части идут параллельно,
+        # и сумма их времени занижала бы скорость во столько раз, сколько было процессов.
+        self.rows += other.rows
+        self.rejected += other.rejected
+        self.extract_seconds += other.extract_seconds
+        self.transform_seconds += other.transform_seconds
+        self.load_seconds += other.load_seconds
+        if not other.started:
+            self.total_seconds += other.total_seconds
+            return
+        self.started = min(self.started, other.started) if self.started else other.started
+        self.finished = max(self.finished, other.finished)
+        self.total_seconds = self.finished - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.total_seconds if self.total_seconds else 0.0
 
 
 class SQLiteLoader:
-    def __init__(self, conn):
+    def __init__(self, conn, batch_size: int = BATCH_SIZE, passthrough: bool = False):
         self.conn = conn
-        self.BATCH_SIZE = 100  
+        self.BATCH_SIZE = batch_size
         self.TABLE_CONFIG = {
         'person': ('id, full_name, created_at, updated_at', Person),
         'genre': ('id, name, description, created_at, updated_at', Genre),
@@ -137,40 +321,133 @@ class SQLiteLoader:
         'genre_film_work': ('id, film_work_id, genre_id, created_at', GenreFilmWork),
         'person_film_work': ('id, film_work_id, person_id, role, created_at', PersonFilmWork)
         }
+        # Колонка, по которой в режиме --delta отбираются изменённые строки.
+        # Сравнивается через iso_timestamp, отметка хранится в том же формате.
+        self.DELTA_COLUMNS = {
+            'person': 'updated_at',
+            'genre': 'updated_at',
+            'film_work': 'updated_at',
+            'genre_film_work': 'created_at',
+            'person_film_work': 'created_at',
+        }
+        # Первая колонка выборки — rowid, поэтому преобразование начинается со второй.
+        row_converters = PASSTHROUGH_CONVERTERS if passthrough else ROW_CONVERTERS
+        self.converters = {
+            table_name: compile_row_converter(converters, offset=1)
+            for table_name, converters in row_converters.items()
+        }
+        # Накопленное время чтения и преобразования и число отброшенных строк, обнуляются в load_table.
+        self.stage_seconds = {'extract': 0.0, 'transform': 0.0}
+        self.rejected_rows = 0
+        # Куда складывать строки, которые не удалось преобразовать; без него они только логируются.
+        self.dead_letter = None
+        self.conn.create_function('iso_timestamp', 1, iso_timestamp, deterministic=True)
 
-    def extract_table(self,table_name: str, columns: str) -> Generator[list[sqlite3.Row], None, None]:
+    def extract_table(self,table_name: str, columns: str,
+                      rowid_range: tuple[int, int] | None = None,
+                      start_after: int | None = None,
+                      since: str | None = None) -> Generator[list[tuple], None, None]:
+        conditions, params = [], []
+        if rowid_range is not None:
+            conditions.append('rowid BETWEEN ? AND ?')
+            params.extend(rowid_range)
+        if start_after is not None:
+            conditions.append('rowid > ?')
+            params.append(start_after)
+        if since is not None:
+            # Строки с неразбираемой датой тоже читаются: на преобразовании они уходят в dead letter,
+            # а не пропадают молча.
+            column = self.DELTA_COLUMNS[table_name]
+            conditions.append(f'(iso_timestamp({column}) > ? OR iso_timestamp({column}) IS NULL)')
+            params.append(since)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
         cursor = self.conn.cursor()
-        cursor.row_factory = sqlite3.Row
-        cursor.execute(f'SELECT {columns} FROM {table_name};')
+        cursor.row_factory = None
+        started = time.perf_counter()
+        cursor.execute(f'SELECT rowid, {columns} FROM {table_name}{where} ORDER BY rowid;', params)
         while batch := cursor.fetchmany(self.BATCH_SIZE):
+            self.stage_seconds['extract'] += time.perf_counter() - started
             yield batch
+            started = time.perf_counter()
+        self.stage_seconds['extract'] += time.perf_counter() - started
+
+    def transform_table(self, table_name: str, columns: str, dataclass_type,
+                        rowid_range: tuple[int, int] | None = None,
+                        start_after: int | None = None,
+                        since: str | None = None) -> Generator[tuple[int, list[tuple]], None, None]:
+        """Отдаёт пары (rowid последней прочитанной строки, кортежи значений пачки).
 
-    def transform_table(self, table_name: str, columns: str, dataclass_type) -> Generator[list, None, None]:
-        for batch in self.extract_table(table_name, columns):
+        Кортежи идут в порядке колонок columns и сразу годятся как параметры для Postgres.
+        """
+        convert = self.converters[table_name]
+        fields = [column.strip() for column in columns.split(',')]
+        for batch in self.extract_table(table_name, columns, rowid_range, start_after, since):
+            started = time.perf_counter()
             items = []
             for row in batch:
                 try:
-                    item = dataclass_type(**dict(row))
-                    items.append(item)
+                    items.append(convert(row))
                 except (ValueError, TypeError) as e:
-                    logger.error(f"Ошибка при создании {dataclass_type.__name__} из строки {dict(row)}: {e}")
+                    logger.error(f"Ошибка при создании {dataclass_type.__name__} из строки {row[1:]}: {e}")
+                    self.rejected_rows += 1
+                    if self.dead_letter is not None:
+                        self.dead_letter.add(table_name, 'transform', dict(zip(fields, row[1:])), str(e))
                     continue
-            yield items
+            self.stage_seconds['transform'] += time.perf_counter() - started
+            yield batch[-1][0], items
+
+    def count_rows(self, table_name: str) -> int:
+        return self.conn.execute(f'SELECT count(*) FROM {table_name};').fetchone()[0]
+
+    def high_water_mark(self, table_name: str) -> str | None:
+        """Наибольшая дата изменения в формате iso_timestamp; неразбираемые значения не учитываются."""
+        column = self.DELTA_COLUMNS[table_name]
+        return self.conn.execute(f'SELECT max(iso_timestamp({column})) FROM {table_name};').fetchone()[0]
+
+    def rowid_ranges(self, table_name: str, chunk_rows: int,
+                     chunks: int | None = None) -> list[tuple[int, int]]:
+        """Делит таблицу на непересекающиеся диапазоны rowid.
 
-    def load_all_data(self) -> dict[str, list]:
-        data = {}
-        for table_name, (columns, dataclass_type) in self.TABLE_CONFIG.items():
-            logger.info(f"Загрузка таблицы {table_name}...")
-            data[table_name] = []
-            for batch in self.transform_table(table_name, columns, dataclass_type):
-                data[table_name].extend(batch)
-            logger.info(f"✅ Загружено {len(data[table_name])} записей из {table_name}")
-        return data
+        Размер диапазона задаётся chunk_rows либо выводится из числа частей chunks.
+        """
+        low, high = self.conn.execute(f'SELECT min(rowid), max(rowid) FROM {table_name};').fetchone()
+        if low is None:
+            return []
+        span = high - low + 1
+        if chunks:
+            chunk_rows = -(-span // chunks)
+        return [(start, min(start + chunk_rows - 1, high)) for start in range(low, high + 1, chunk_rows)]
 
 
 class PostgresSaver:
-    def __init__(self, connection: _connection):
+    FIELD_MAPPING = {
+        'content.person': {'created_at': 'created', 'updated_at': 'modified'},
+        'content.film_work': {'created_at': 'created', 'updated_at': 'modified'},
+        'content.genre': {'created_at': 'created', 'updated_at': 'modified'},
+        'content.genre_film_work': {'created_at': 'created'},
+        'content.person_film_work': {'created_at': 'created'},
+    }
+
+    ON_CONFLICT_FIELDS = {
+        'content.person_film_work': '(film_work_id, person_id)',
+        'content.genre_film_work': '(film_work_id, genre_id)',
+    }
+
+    def __init__(self, connection: _connection, mode: str = 'auto', copy_threshold: int = COPY_THRESHOLD,
+                 upsert: bool = False, dead_letter=None, table_suffix: str = ''):
+        if mode not in SAVE_MODES:
+            raise ValueError(f"Неизвестный режим записи: {mode}")
         self.connection = connection
+        self.mode = mode
+        self.copy_threshold = copy_threshold
+        # upsert: при конфликте обновлять строку (ON CONFLICT DO UPDATE), а не пропускать.
+        self.upsert = upsert
+        # С dead_letter упавшая пачка делится пополам до отдельных строк, которые уходят в dead_letter.
+        self.dead_letter = dead_letter
+        # Данные пишутся в таблицу с этим суффиксом, а сопоставление полей и ON CONFLICT берутся от исходной.
+        self.table_suffix = table_suffix
+        # Временные таблицы COPY, уже созданные в этой сессии.
+        self._staging_tables = set()
         self.TABLE_CONFIG = {
             'film_work': 'content.film_work',
             'genre': 'content.genre',
@@ -179,73 +456,625 @@ class PostgresSaver:
             'person_film_work': 'content.person_film_work',
         }
 
-    def save_all_data(self, data: dict):
-        for table_name, records in data.items():
-            if not records:
-                continue
+    def save_batch(self, table_name: str, records: list[tuple], fields: list[str], use_copy: bool = False) -> int:
+        """Сохраняет кортежи значений, упорядоченные как поля fields из SQLite.
+
+        Возвращает число записанных строк: без dead_letter это вся пачка,
+        с ним — пачка без строк, отправленных в dead_letter.
+        """
+        if not records:
+            return 0
+
+        if table_name not in self.TABLE_CONFIG:
+            logger.warning(f"Неизвестная таблица: {table_name}")
+            return 0
+
+        table_sql_name = self.TABLE_CONFIG[table_name]
+        write = self._copy_table if use_copy else self._save_table
+        if self.dead_letter is None:
+            write(table_sql_name, records, fields)
+            return len(records)
+        return self._save_bisecting(table_name, write, records, fields)
+
+    def _save_bisecting(self, table_name: str, write, records: list[tuple], fields: list[str]) -> int:
+        # Пачка пишется под точкой сохранения: при ошибке откатывается только она,
+        # а половины пробуются отдельно. Одна плохая строка стоит ~2*log2(N) лишних запросов.
+        with self.connection.cursor() as cur:
+            cur.execute("SAVEPOINT save_batch;")
+            try:
+                write(self.TABLE_CONFIG[table_name], records, fields)
+            except (psycopg.DataError, psycopg.IntegrityError) as e:
+                cur.execute("ROLLBACK TO SAVEPOINT save_batch;")
+                cur.execute("RELEASE SAVEPOINT save_batch;")
+                if len(records) == 1:
+                    self.dead_letter.add(table_name, 'load', dict(zip(fields, records[0])), str(e))
+                    return 0
+                middle = len(records) // 2
+                return (self._save_bisecting(table_name, write, records[:middle], fields)
+                        + self._save_bisecting(table_name, write, records[middle:], fields))
+            cur.execute("RELEASE SAVEPOINT save_batch;")
+        return len(records)
+
+    def use_copy_for(self, rows_count: int) -> bool:
+        if self.mode == 'auto':
+            return rows_count >= self.copy_threshold
+        return self.mode == 'copy'
+
+    def _get_db_fields(self, table_name: str, fields: list[str]) -> list[str]:
+        field_mapping = self.FIELD_MAPPING.get(table_name, {})
+        return [field_mapping.get(f, f) for f in fields]
 
-            if table_name not in self.TABLE_CONFIG:
-                logger.warning(f"Неизвестная таблица: {table_name}")
-                continue
+    def _conflict_columns(self, table_name: str) -> list[str]:
+        conflict_fields = self.ON_CONFLICT_FIELDS.get(table_name, '(id)')
+        return [f.strip() for f in conflict_fields.strip('()').split(',')]
 
-            table_sql_name = self.TABLE_CONFIG[table_name]
-            self._save_table(table_sql_name, records)
-            logger.info(f"✅ Сохранено {len(records)} записей в {table_sql_name}")
+    def _conflict_clause(self, table_name: str, db_fields: list[str]) -> str:
+        conflict_fields = self.ON_CONFLICT_FIELDS.get(table_name, '(id)')
+        if not self.upsert:
+            return f"ON CONFLICT {conflict_fields} DO NOTHING"
+        # id не обновляем: у связей конфликт по паре ключей, и id строки в Postgres остаётся прежним.
+        skip = set(self._conflict_columns(table_name)) | {'id'}
+        updates = ', '.join(f"{f} = EXCLUDED.{f}" for f in db_fields if f not in skip)
+        if not updates:
+            return f"ON CONFLICT {conflict_fields} DO NOTHING"
+        return f"ON CONFLICT {conflict_fields} DO UPDATE SET {updates}"
 
-    def _save_table(self, table_name: str, records: list):
+    def _save_table(self, table_name: str, records: list[tuple], fields: list[str]):
         if not records:
             return
-        FIELD_MAPPING = {
-            'content.person': {'created_at': 'created', 'updated_at': 'modified'},
-            'content.film_work': {'created_at': 'created', 'updated_at': 'modified'},
-            'content.genre': {'created_at': 'created', 'updated_at': 'modified'},
-            'content.genre_film_work': {'created_at': 'created'},
-            'content.person_film_work': {'created_at': 'created'},
-        }
-
-        ON_CONFLICT_FIELDS = {
-        'content.person_film_work': '(film_work_id, person_id)',
-        }
 
-        conflict_fields = ON_CONFLICT_FIELDS.get(table_name, '(id)')
-        field_mapping = FIELD_MAPPING.get(table_name, {})
-        sample_record = records[0]
-        original_fields = list(sample_record.__dict__.keys())
-        db_fields = [field_mapping.get(f, f) for f in original_fields]
+        db_fields = self._get_db_fields(table_name, fields)
+        conflict_clause = self._conflict_clause(table_name, db_fields)
         fields_sql = ', '.join(db_fields)
-        params_sql = ', '.join([f'%({f})s' for f in db_fields]) 
+        params_sql = ', '.join(['%s'] * len(db_fields))
 
         insert_query = f"""
-            INSERT INTO {table_name} ({fields_sql})
+            INSERT INTO {table_name}{self.table_suffix} ({fields_sql})
             VALUES ({params_sql})
-            ON CONFLICT {conflict_fields} DO NOTHING;
+            {conflict_clause};
         """
 
         with self.connection.cursor() as cur:
             for record in records:
                 try:
-                    params = {}
-                    for orig_field, db_field in zip(original_fields, db_fields):
-                        value = getattr(record, orig_field)
-                        params[db_field] = value
-
-                    cur.execute(insert_query, params)
+                    cur.execute(insert_query, record)
                 except Exception as e:
                     logger.error(f"Ошибка при вставке записи {record} в {table_name}: {e}")
                     raise
-            self.connection.commit()
 
-def load_from_sqlite(connection: sqlite3.Connection, pg_conn: _connection):
-    postgres_saver = PostgresSaver(pg_conn)
-    sqlite_loader = SQLiteLoader(connection)
+    def _copy_table(self, table_name: str, records: list[tuple], fields: list[str]):
+        """Записывает таблицу через COPY во временную таблицу и один INSERT ... SELECT.
+
+        Семантика ON CONFLICT та же, что и в _save_table. Временная таблица создаётся
+        один раз за сессию, а INSERT забирает из неё пачку через DELETE ... RETURNING:
+        на пачку уходят два запроса, COPY и INSERT.
+        """
+        if not records:
+            return
+
+        db_fields = self._get_db_fields(table_name, fields)
+        conflict_clause = self._conflict_clause(table_name, db_fields)
+        fields_sql = ', '.join(db_fields)
+        staging_table = f"staging_{table_name.split('.')[-1]}"
+        select_sql = f"SELECT {fields_sql} FROM batch"
+        if self.upsert:
+            # DO UPDATE не может дважды изменить одну строку в одном запросе,
+            # поэтому из повторов внутри пачки оставляем одну строку.
+            key_sql = ', '.join(self._conflict_columns(table_name))
+            select_sql = f"SELECT DISTINCT ON ({key_sql}) {fields_sql} FROM batch ORDER BY {key_sql}"
+
+        with self.connection.cursor() as cur:
+            try:
+                if staging_table not in self._staging_tables:
+                    # Строки между коммитами удаляет DELETE в INSERT, остаток — ON COMMIT DELETE ROWS.
+                    cur.execute(
+                        f"CREATE TEMP TABLE IF NOT EXISTS {staging_table} "
+                        f"(LIKE {table_name}{self.table_suffix} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS;"
+                    )
+                    self._staging_tables.add(staging_table)
+                with cur.copy(f"COPY {staging_table} ({fields_sql}) FROM STDIN") as copy:
+                    for record in records:
+                        copy.write_row(record)
+                cur.execute(f"""
+                    WITH batch AS (DELETE FROM {staging_table} RETURNING {fields_sql})
+                    INSERT INTO {table_name}{self.table_suffix} ({fields_sql})
+                    {select_sql}
+                    {conflict_clause};
+                """)
+            except Exception as e:
+                # CREATE мог откатиться вместе с пачкой, в следующий раз таблица создаётся заново.
+                self._staging_tables.discard(staging_table)
+                logger.error(f"Ошибка при копировании записей в {table_name}: {e}")
+                raise
+
+
+class CheckpointStore:
+    """Хранит в Postgres rowid последней закоммиченной пачки каждой таблицы (или её части)."""
+
+    SCHEMA = 'content_migration'
+    # Ключ чекпоинтов --delta: у синхронизации своя позиция, она не затирает позицию полной загрузки.
+    DELTA_RANGE_START = -1
+
+    def __init__(self, connection: _connection):
+        self.connection = connection
+
+    def ensure_schema(self):
+        with self.connection.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {self.SCHEMA};")
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.SCHEMA}.checkpoint (
+                    table_name TEXT NOT NULL,
+                    range_start BIGINT NOT NULL,
+                    last_rowid BIGINT NOT NULL,
+                    batches BIGINT NOT NULL,
+                    modified TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                    PRIMARY KEY (table_name, range_start)
+                );
+            """)
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.SCHEMA}.sync_state (
+                    table_name TEXT PRIMARY KEY,
+                    high_water_mark TEXT NOT NULL,
+                    modified TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+                );
+            """)
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.SCHEMA}.content_errors (
+                    id BIGSERIAL PRIMARY KEY,
+                    table_name TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    reason TEXT NOT NULL,
+                    row JSONB NOT NULL,
+                    created TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+                );
+            """)
+        self.connection.commit()
+
+    def clear(self, delta: bool = False):
+        """Удаляет чекпоинты прошлых запусков, чтобы новый запуск без --resume не унаследовал их позиции."""
+        condition = '=' if delta else '<>'
+        with self.connection.cursor() as cur:
+            cur.execute(f"DELETE FROM {self.SCHEMA}.checkpoint WHERE range_start {condition} %s;",
+                        (self.DELTA_RANGE_START,))
+        self.connection.commit()
+
+    def get(self, table_name: str, range_start: int) -> int | None:
+        with self.connection.cursor() as cur:
+            cur.execute(
+                f"SELECT last_rowid FROM {self.SCHEMA}.checkpoint WHERE table_name = %s AND range_start = %s;",
+                (table_name, range_start),
+            )
+            row = cur.fetchone()
+        if row is None:
+            return None
+        return row['last_rowid'] if isinstance(row, dict) else row[0]
+
+    def save(self, table_name: str, range_start: int, last_rowid: int, batches: int):
+        # Коммитится вместе с данными пачек, поэтому чекпоинт не опережает данные.
+        with self.connection.cursor() as cur:
+            cur.execute(f"""
+                INSERT INTO {self.SCHEMA}.checkpoint (table_name, range_start, last_rowid, batches)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (table_name, range_start) DO UPDATE
+                SET last_rowid = EXCLUDED.last_rowid, batches = EXCLUDED.batches, modified = now();
+            """, (table_name, range_start, last_rowid, batches))
+
+    def get_high_water_mark(self, table_name: str) -> str | None:
+        with self.connection.cursor() as cur:
+            cur.execute(f"SELECT high_water_mark FROM {self.SCHEMA}.sync_state WHERE table_name = %s;", (table_name,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        return row['high_water_mark'] if isinstance(row, dict) else row[0]
+
+    def save_high_water_mark(self, table_name: str, high_water_mark: str):
+        with self.connection.cursor() as cur:
+            cur.execute(f"""
+                INSERT INTO {self.SCHEMA}.sync_state (table_name, high_water_mark)
+                VALUES (%s, %s)
+                ON CONFLICT (table_name) DO UPDATE
+                SET high_water_mark = EXCLUDED.high_water_mark, modified = now();
+            """, (table_name, high_water_mark))
+        self.connection.commit()
+
+
+class JsonlDeadLetter:
+    """Пишет отброшенные строки в файл JSON lines: таблица, стадия, причина и значения строки."""
+
+    def __init__(self, path: str):
+        # Режим дозаписи с построчной буферизацией: в файл могут писать несколько процессов.
+        self.file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def add(self, table_name: str, stage: str, row: dict, reason: str):
+        self.file.write(json.dumps(
+            {'table': table_name, 'stage': stage, 'reason': reason, 'row': row},
+            ensure_ascii=False, default=str,
+        ) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class TableDeadLetter:
+    """Пишет отброшенные строки в таблицу content_errors; коммитится вместе с данными пачек."""
+
+    TABLE = f'{CheckpointStore.SCHEMA}.content_errors'
+
+    def __init__(self, connection: _connection):
+        self.connection = connection
+
+    def add(self, table_name: str, stage: str, row: dict, reason: str):
+        with self.connection.cursor() as cur:
+            cur.execute(
+                f"INSERT INTO {self.TABLE} (table_name, stage, reason, row) VALUES (%s, %s, %s, %s);",
+                (table_name, stage, reason, Jsonb(row, dumps=lambda obj: json.dumps(obj, default=str))),
+            )
+
+    def close(self):
+        pass
+
+
+def make_dead_letter(target: str | None, connection: _connection):
+    """--dead-letter table пишет в Postgres, любое другое значение — путь к файлу JSONL."""
+    if not target:
+        return None
+    if target == 'table':
+        return TableDeadLetter(connection)
+    return JsonlDeadLetter(target)
+
+
+def load_table(sqlite_loader: SQLiteLoader, postgres_saver: PostgresSaver, table_name: str,
+               options: LoadOptions, rowid_range: tuple[int, int] | None = None,
+               total: int | None = None, since: str | None = None,
+               metrics: MigrationMetrics | None = None) -> TableStats:
+    """Переносит одну таблицу (или диапазон rowid) пачками: каждая пачка сразу уходит в Postgres.
+
+    Коммит выполняется раз в options.commit_every пачек вместе с чекпоинтом,
+    с --resume загрузка продолжается после последнего закоммиченного rowid.
+    Если RSS процесса превышает options.memory_limit_mb и продолжает расти, размер пачки
+    уменьшается вдвое; когда RSS опускается ниже лимита, пачка снова растёт до options.batch_size.
+    total — число записей во всей таблице, по нему выбирается COPY или INSERT.
+    since — в режиме --delta берутся только строки, изменённые позже этой отметки.
+    metrics получает время стадий и прогресс по каждой пачке.
+    """
+    columns, dataclass_type = sqlite_loader.TABLE_CONFIG[table_name]
+    fields = [column.strip() for column in columns.split(',')]
+    if total is None:
+        total = sqlite_loader.count_rows(table_name)
+    use_copy = postgres_saver.use_copy_for(total)
+    part = f" rowid {rowid_range[0]}..{rowid_range[1]}" if rowid_range else ''
+    if options.delta:
+        range_start = CheckpointStore.DELTA_RANGE_START
+    else:
+        range_start = rowid_range[0] if rowid_range else 0
+    checkpoints = CheckpointStore(postgres_saver.connection)
+    start_after = checkpoints.get(table_name, range_start) if options.resume else None
+    if start_after is not None:
+        logger.info(f"Таблица {table_name}{part}: продолжаем после rowid {start_after}")
+    logger.info(f"Перенос таблицы {table_name}{part} ({total} записей, {'COPY' if use_copy else 'INSERT'})...")
+
+    stats = TableStats(table_name)
+    sqlite_loader.stage_seconds = {'extract': 0.0, 'transform': 0.0}
+    sqlite_loader.rejected_rows = 0
+    # Для части таблицы ETA считается по ширине диапазона rowid.
+    expected = rowid_range[1] - rowid_range[0] + 1 if rowid_range else total
+    if metrics:
+        metrics.table_started(table_name, part, expected)
+    previous = dict(sqlite_loader.stage_seconds)
+    load_rejected = 0
+    stats.started = time.time()
+    started = time.perf_counter()
+    batches = 0
+    last_rowid = None
+    # RSS на момент последнего уменьшения пачки: пока он не вырос, пачку больше не уменьшаем.
+    halved_at_rss = None
+    try:
+        for last_rowid, batch in sqlite_loader.transform_table(
+            table_name, columns, dataclass_type, rowid_range, start_after, since,
+        ):
+            load_started = time.perf_counter()
+            saved = postgres_saver.save_batch(table_name, batch, fields, use_copy=use_copy)
+            load_seconds = time.perf_counter() - load_started
+            stats.load_seconds += load_seconds
+            stats.rows += saved
+            load_rejected += len(batch) - saved
+            batches += 1
+            if metrics:
+                seconds = {stage: sqlite_loader.stage_seconds[stage] - previous[stage] for stage in previous}
+                rejected = sqlite_loader.rejected_rows + load_rejected
+                metrics.batch(table_name, part, saved, rejected - stats.rejected,
+                              {**seconds, 'load': load_seconds}, stats.rows + rejected, expected)
+                previous = dict(sqlite_loader.stage_seconds)
+                stats.rejected = rejected
+            del batch
+            if batches % options.commit_every == 0:
+                load_started = time.perf_counter()
+                checkpoints.save(table_name, range_start, last_rowid, batches)
+                postgres_saver.connection.commit()
+                stats.load_seconds += time.perf_counter() - load_started
+            if options.memory_limit_mb:
+                rss = current_rss_mb()
+                if rss > options.memory_limit_mb:
+                    if sqlite_loader.BATCH_SIZE > 1 and (halved_at_rss is None or rss > halved_at_rss):
+                        gc.collect()
+                        halved_at_rss = rss
+                        sqlite_loader.BATCH_SIZE = max(1, sqlite_loader.BATCH_SIZE // 2)
+                        logger.warning(f"RSS превысил {options.memory_limit_mb} МБ, "
+                                       f"размер пачки уменьшен до {sqlite_loader.BATCH_SIZE}")
+                elif sqlite_loader.BATCH_SIZE < options.batch_size:
+                    halved_at_rss = None
+                    sqlite_loader.BATCH_SIZE = min(options.batch_size, sqlite_loader.BATCH_SIZE * 2)
+                    logger.info(f"RSS ниже {options.memory_limit_mb} МБ, "
+                                f"размер пачки увеличен до {sqlite_loader.BATCH_SIZE}")
+        load_started = time.perf_counter()
+        if last_rowid is not None:
+            checkpoints.save(table_name, range_start, last_rowid, batches)
+        postgres_saver.connection.commit()
+        stats.load_seconds += time.perf_counter() - load_started
+    except Exception:
+        postgres_saver.connection.rollback()
+        raise
+    stats.extract_seconds = sqlite_loader.stage_seconds['extract']
+    stats.transform_seconds = sqlite_loader.stage_seconds['transform']
+    stats.rejected = sqlite_loader.rejected_rows + load_rejected
+    stats.total_seconds = time.perf_counter() - started
+    stats.finished = time.time()
+    if metrics:
+        metrics.table_finished(stats, part)
+    logger.info(f"✅ Сохранено {stats.rows} записей в {table_name}{part}")
+    return stats
+
+
+def load_from_sqlite(connection: sqlite3.Connection, pg_conn: _connection,
+                     options: LoadOptions | None = None) -> list[TableStats]:
+    options = options or LoadOptions()
+    metrics = MigrationMetrics(options.metrics_jsonl, options.prometheus_textfile)
+    dead_letter = make_dead_letter(options.dead_letter, pg_conn)
+    postgres_saver = PostgresSaver(
+        pg_conn, mode=options.mode, copy_threshold=options.copy_threshold, upsert=options.delta,
+        dead_letter=dead_letter, table_suffix=options.table_suffix,
+    )
+    sqlite_loader = SQLiteLoader(connection, batch_size=options.batch_size, passthrough=options.passthrough)
+    sqlite_loader.dead_letter = dead_letter
+    checkpoints = CheckpointStore(pg_conn)
+    checkpoints.ensure_schema()
+    if not options.resume:
+        checkpoints.clear(options.delta)
+
+    stats = []
+    try:
+        with profiled(options.profile, options.profiler):
+            for table_name in sqlite_loader.TABLE_CONFIG:
+                if options.delta:
+                    stats.append(sync_table_delta(
+                        sqlite_loader, postgres_saver, checkpoints, table_name, options, metrics,
+                    ))
+                else:
+                    stats.append(load_table(sqlite_loader, postgres_saver, table_name, options, metrics=metrics))
+    finally:
+        metrics.close()
+        if dead_letter is not None:
+            dead_letter.close()
+    return stats
+
+
+def sync_table_delta(sqlite_loader: SQLiteLoader, postgres_saver: PostgresSaver,
+                     checkpoints: CheckpointStore, table_name: str, options: LoadOptions,
+                     metrics: MigrationMetrics | None = None) -> TableStats:
+    """Переносит строки, изменённые после сохранённой отметки, и сдвигает отметку.
+
+    Новая отметка берётся до чтения, поэтому строки, изменённые во время
+    синхронизации, попадут в следующий запуск. Без отметки переносится вся таблица.
+    """
+    since = checkpoints.get_high_water_mark(table_name)
+    if since is not None and iso_timestamp(since) is None:
+        logger.warning(f"Таблица {table_name}: сохранённая отметка {since!r} не разбирается, "
+                       f"синхронизируется вся таблица")
+        since = None
+    elif since is not None:
+        # Отметки прежних запусков записаны как есть, приводим к формату сравнения.
+        since = iso_timestamp(since)
+    new_mark = sqlite_loader.high_water_mark(table_name)
+    if new_mark is None or new_mark == since:
+        logger.info(f"Таблица {table_name}: изменений нет")
+        return TableStats(table_name)
+    logger.info(f"Таблица {table_name}: синхронизация изменений после {since or 'начала'}")
+    stats = load_table(sqlite_loader, postgres_saver, table_name, options, since=since, metrics=metrics)
+    checkpoints.save_high_water_mark(table_name, new_mark)
+    return stats
+
+
+def connect_sqlite_readonly(sqlite_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f'file:{sqlite_path}?mode=ro', uri=True)
+
+
+def connect_postgres(dsl: dict) -> _connection:
+    # Триггеры документов фильмов в сессиях загрузчика только ставят фильмы в очередь,
+    # документы пересобираются в конце (drain_film_work_documents, refresh_film_work_documents).
+    options = f"{dsl.get('options', '')} -c {DOCUMENT_REFRESH_SETTING}=deferred".strip()
+    return psycopg.connect(**{**dsl, 'options': options}, row_factory=dict_row, cursor_factory=ClientCursor)
+
+
+def _load_table_job(sqlite_path: str, dsl: dict, table_name: str, options: LoadOptions,
+                    rowid_range: tuple[int, int] | None = None, total: int | None = None) -> TableStats:
+    # Выполняется в отдельном процессе со своими соединениями к SQLite и Postgres.
+    # Итоги в textfile пишет главный процесс, здесь — только прогресс части в свой файл.
+    textfile = part_textfile(options.prometheus_textfile, table_name, rowid_range)
+    metrics = MigrationMetrics(options.metrics_jsonl, textfile, totals=False)
+    profile = f"{options.profile}.{table_name}.{rowid_range[0] if rowid_range else 0}" if options.profile else None
+    with closing(connect_sqlite_readonly(sqlite_path)) as sqlite_conn, connect_postgres(dsl) as pg_conn, \
+            closing(metrics), profiled(profile, options.profiler):
+        dead_letter = make_dead_letter(options.dead_letter, pg_conn)
+        postgres_saver = PostgresSaver(
+            pg_conn, mode=options.mode, copy_threshold=options.copy_threshold, upsert=options.delta,
+            dead_letter=dead_letter, table_suffix=options.table_suffix,
+        )
+        sqlite_loader = SQLiteLoader(sqlite_conn, batch_size=options.batch_size, passthrough=options.passthrough)
+        sqlite_loader.dead_letter = dead_letter
+        try:
+            return load_table(sqlite_loader, postgres_saver, table_name, options,
+                              rowid_range=rowid_range, total=total, metrics=metrics)
+        finally:
+            if dead_letter is not None:
+                dead_letter.close()
+
+
+def plan_table_jobs(sqlite_path: str, table_name: str, chunk_rows: int,
+                    chunks: int | None = None) -> tuple[int, list[tuple[int, int] | None]]:
+    """Возвращает число записей в таблице и список диапазонов rowid для загрузки.
+
+    Таблица целиком (None вместо диапазона) грузится, если она не больше chunk_rows
+    записей и число частей не задано явно.
+    """
+    with closing(connect_sqlite_readonly(sqlite_path)) as sqlite_conn:
+        sqlite_loader = SQLiteLoader(sqlite_conn)
+        total = sqlite_loader.count_rows(table_name)
+        if total <= chunk_rows and not chunks:
+            return total, [None]
+        ranges = sqlite_loader.rowid_ranges(table_name, chunk_rows, chunks)
+    if ranges:
+        width = ranges[0][1] - ranges[0][0] + 1
+        logger.info(f"Таблица {table_name} ({total} записей) разбита на {len(ranges)} частей по {width} rowid")
+    return total, ranges
+
+
+def load_parallel(sqlite_path: str, dsl: dict, workers: int, options: LoadOptions | None = None,
+                  chunk_rows: int = CHUNK_ROWS, chunks: int | None = None) -> list[TableStats]:
+    """Грузит независимые таблицы одновременно в пуле из workers процессов.
+
+    Этапы из TABLE_STAGES выполняются по очереди, поэтому таблицы связей
+    начинают загружаться только после всех родительских таблиц. Большие таблицы
+    делятся на диапазоны rowid, которые грузятся параллельно; повторы
+    между частями отсекаются ON CONFLICT. Для --resume разбиение на части
+    должно совпадать с прерванным запуском.
+    """
+    options = options or LoadOptions()
+    with connect_postgres(dsl) as pg_conn:
+        checkpoints = CheckpointStore(pg_conn)
+        checkpoints.ensure_schema()
+        if not options.resume:
+            checkpoints.clear(options.delta)
+    metrics = MigrationMetrics(prometheus_path=options.prometheus_textfile)
+    stats = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for stage in TABLE_STAGES:
+            futures = []
+            for table_name in stage:
+                total, ranges = plan_table_jobs(sqlite_path, table_name, chunk_rows, chunks)
+                for rowid_range in ranges:
+                    future = pool.submit(
+                        _load_table_job, sqlite_path, dsl, table_name, options, rowid_range, total,
+                    )
+                    futures.append((table_name, future))
+            for table_name, future in futures:
+                try:
+                    part_stats = future.result()
+                    stats.setdefault(table_name, TableStats(table_name)).merge(part_stats)
+                    metrics.add_stats(part_stats)
+                except Exception as e:
+                    logger.error(f"Ошибка при загрузке таблицы {table_name}: {e}")
+                    raise
+    return list(stats.values())
+
 
-    data = sqlite_loader.load_all_data()
-    postgres_saver.save_all_data(data)
+def parse_args():
+    parser = argparse.ArgumentParser(description='Перенос данных из SQLite в PostgreSQL')
+    parser.add_argument('--sqlite-path', default='db.sqlite')
+    parser.add_argument('--mode', choices=SAVE_MODES, default='auto',
+                        help='insert — построчно, copy — через COPY, auto — COPY для больших таблиц')
+    parser.add_argument('--copy-threshold', type=int, default=COPY_THRESHOLD,
+                        help='с какого количества записей режим auto переключается на COPY')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--memory-limit-mb', type=float, default=None,
+                        help='потолок RSS, при превышении которого размер пачки уменьшается')
+    parser.add_argument('--commit-every', type=int, default=COMMIT_EVERY,
+                        help='через сколько пачек коммитить данные и чекпоинт')
+    parser.add_argument('--resume', action='store_true',
+                        help='пропустить строки, закоммиченные прерванным запуском')
+    parser.add_argument('--delta', action='store_true',
+                        help='перенести только строки, изменённые с прошлой синхронизации (ON CONFLICT DO UPDATE)')
+    parser.add_argument('--passthrough', action='store_true',
+                        help='не разбирать UUID и даты, а передавать проверенные строки в Postgres как есть')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='количество процессов для параллельной загрузки таблиц')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help='размер диапазона rowid при параллельном чтении большой таблицы')
+    parser.add_argument('--chunks', type=int, default=None,
+                        help='на сколько частей делить каждую таблицу (вместо --chunk-rows)')
+    parser.add_argument('--metrics-jsonl', default=None,
+                        help='файл для событий по пачкам и таблицам в формате JSON lines')
+    parser.add_argument('--prometheus-textfile', default=None,
+                        help='файл .prom с итогами по таблицам для textfile collector node exporter')
+    parser.add_argument('--profile', default=None,
+                        help='сохранить профиль загрузки в файл (в параллельном режиме — по файлу на часть)')
+    parser.add_argument('--profiler', choices=PROFILERS, default='cprofile')
+    parser.add_argument('--bulk', action='store_true',
+                        help='создать таблицы без индексов и внешних ключей, а после загрузки '
+                             'построить индексы, проверить ограничения и выполнить ANALYZE')
+    parser.add_argument('--index-workers', type=int, default=INDEX_WORKERS,
+                        help='сколько индексов строить одновременно в режиме --bulk')
+    parser.add_argument('--maintenance-work-mem', default=MAINTENANCE_WORK_MEM,
+                        help='maintenance_work_mem для построения индексов в режиме --bulk')
+    parser.add_argument('--swap', action='store_true',
+                        help=f'полная перезаливка: загрузить в UNLOGGED-таблицы content.*{SHADOW_SUFFIX}, '
+                             f'построить индексы и подменить ими рабочие; прежние останутся как *{OLD_SUFFIX}')
+    parser.add_argument('--rollback-swap', action='store_true',
+                        help=f'вернуть таблицы *{OLD_SUFFIX} на место рабочих и выйти')
+    parser.add_argument('--dead-letter', default=None,
+                        help='куда складывать отброшенные строки: путь к файлу JSONL или table '
+                             f'для таблицы {CheckpointStore.SCHEMA}.content_errors; упавшие пачки делятся пополам')
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
+    args = parse_args()
     dsl = {'dbname': os.environ.get('DB_NAME'), 'user': os.environ.get('DB_USER'),'password': os.environ.get('DB_PASSWORD'), 'host': os.environ.get('DB_HOST', '127.0.0.1'), 'port': os.environ.get('DB_PORT', 5432)}
-    with sqlite3.connect('db.sqlite') as sqlite_conn, psycopg.connect(
-        **dsl, row_factory=dict_row, cursor_factory=ClientCursor
-    ) as pg_conn:
-        load_from_sqlite(sqlite_conn, pg_conn)
+    load_options = LoadOptions(
+        mode=args.mode,
+        copy_threshold=args.copy_threshold,
+        batch_size=args.batch_size,
+        memory_limit_mb=args.memory_limit_mb,
+        commit_every=args.commit_every,
+        resume=args.resume,
+        delta=args.delta,
+        passthrough=args.passthrough,
+        metrics_jsonl=args.metrics_jsonl,
+        prometheus_textfile=args.prometheus_textfile,
+        profile=args.profile,
+        profiler=args.profiler,
+        dead_letter=args.dead_letter,
+        table_suffix=SHADOW_SUFFIX if args.swap else '',
+    )
+    if args.rollback_swap:
+        with connect_postgres(dsl) as pg_conn:
+            swap_tables(pg_conn, incoming=OLD_SUFFIX, outgoing=SHADOW_SUFFIX)
+            refresh_film_work_documents(pg_conn)
+        raise SystemExit
+    if args.resume and args.delta:
+        raise SystemExit('--delta сам продолжает с сохранённой отметки и несовместим с --resume')
+    if args.swap and args.delta:
+        raise SystemExit('--swap перезаливает таблицы целиком и несовместим с --delta')
+    if args.bulk:
+        with connect_postgres(dsl) as pg_conn:
+            create_bare_tables(pg_conn)
+    if args.swap:
+        with connect_postgres(dsl) as pg_conn:
+            create_shadow_tables(pg_conn, recreate=not args.resume)
+    # Синхронизация изменений небольшая по объёму и всегда идёт в одном процессе.
+    if args.workers > 1 and not args.delta:
+        load_parallel(args.sqlite_path, dsl, args.workers, load_options,
+                      chunk_rows=args.chunk_rows, chunks=args.chunks)
+    else:
+        with sqlite3.connect(args.sqlite_path) as sqlite_conn, connect_postgres(dsl) as pg_conn:
+            load_from_sqlite(sqlite_conn, pg_conn, load_options)
+    if args.bulk or args.swap:
+        with connect_postgres(dsl) as pg_conn:
+            finish_bulk_load(dsl, pg_conn, args.index_workers, args.maintenance_work_mem, load_options.table_suffix)
+    if args.swap:
+        with connect_postgres(dsl) as pg_conn:
+            swap_tables(pg_conn)
+    with connect_postgres(dsl) as pg_conn:
+        if args.bulk or args.swap:
+            refresh_film_work_documents(pg_conn)
+        else:
+            drain_film_work_documents(pg_conn)
@@ -0,0 +1,190 @@
+"""Метрики загрузки: события по пачкам, прогресс с ETA и профилирование.
+
+События пишутся в JSON lines (по строке на пачку и на таблицу), итоги по
+таблицам и прогресс незавершённых таблиц — в textfile для node exporter.
+Параллельные процессы дописывают в один JSONL-файл; итоги пишет главный
+процесс, а прогресс своей части каждый процесс пишет в отдельный textfile.
+"""
+import cProfile
+import dataclasses
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Как часто писать в лог прогресс по таблице, в секундах.
+PROGRESS_SECONDS = 30
+# Как часто обновлять textfile прогрессом по пачкам, в секундах.
+TEXTFILE_SECONDS = 15
+PROFILERS = ('cprofile', 'pyinstrument')
+STAGES = ('extract', 'transform', 'load')
+
+
+def part_textfile(prometheus_path: str | None, table_name: str, rowid_range: tuple[int, int] | None) -> str | None:
+    """Textfile для прогресса части таблицы рядом с общим: migration.prom -> migration.film_work.1.prom."""
+    if not prometheus_path:
+        return None
+    stem, ext = os.path.splitext(prometheus_path)
+    return f'{stem}.{table_name}.{rowid_range[0] if rowid_range else 0}{ext}'
+
+
+class MigrationMetrics:
+    """totals=False — в textfile только прогресс, без итогов (файл части в параллельном режиме)."""
+
+    def __init__(self, jsonl_path: str | None = None, prometheus_path: str | None = None,
+                 progress_seconds: float = PROGRESS_SECONDS, textfile_seconds: float = TEXTFILE_SECONDS,
+                 totals: bool = True):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.progress_seconds = progress_seconds
+        self.textfile_seconds = textfile_seconds
+        self.totals = totals
+        self.tables = {}
+        self._progress = {}
+        self._textfile_written = time.perf_counter()
+        self._jsonl = None
+
+    def _emit(self, event: dict):
+        if not self.jsonl_path:
+            return
+        if self._jsonl is None:
+            # Построчная буферизация и режим дозаписи: строки разных процессов не перемешиваются.
+            self._jsonl = open(self.jsonl_path, 'a', encoding='utf-8', buffering=1)
+        self._jsonl.write(json.dumps({'ts': time.time(), 'pid': os.getpid(), **event}, ensure_ascii=False) + '\n')
+
+    def table_started(self, table_name: str, part: str, total: int):
+        self._progress[(table_name, part)] = {
+            'started': time.perf_counter(), 'logged': time.perf_counter(), 'done': 0, 'total': total, 'eta': 0.0,
+        }
+        self._emit({'event': 'table_started', 'table': table_name, 'part': part, 'total': total})
+
+    def batch(self, table_name: str, part: str, rows: int, rejected: int, seconds: dict[str, float],
+              done: int, total: int):
+        """Фиксирует пачку: seconds — время стадий extract/transform/load этой пачки."""
+        progress = self._progress[(table_name, part)]
+        now = time.perf_counter()
+        elapsed = now - progress['started']
+        rate = done / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if rate and total > done else 0.0
+        progress.update(done=done, total=total, eta=eta)
+        self._emit({
+            'event': 'batch', 'table': table_name, 'part': part, 'rows': rows, 'rejected': rejected,
+            **{f'{stage}_seconds': seconds[stage] for stage in STAGES},
+            'done': done, 'total': total, 'rows_per_second': rate, 'eta_seconds': eta,
+        })
+        if now - progress['logged'] >= self.progress_seconds:
+            progress['logged'] = now
+            percent = done / total if total else 1.0
+            logger.info(f"Таблица {table_name}{part}: {done}/{total} ({percent:.0%}), "
+                        f"{rate:,.0f} строк/с, осталось ~{eta:.0f} с")
+        if now - self._textfile_written >= self.textfile_seconds:
+            self.write_textfile()
+
+    def table_finished(self, stats, part: str):
+        self._progress.pop((stats.table_name, part), None)
+        self._emit({'event': 'table_finished', 'part': part, **dataclasses.asdict(stats),
+                    'rows_per_second': stats.rows_per_second})
+        if self.totals:
+            self.add_stats(stats)
+        else:
+            self.write_textfile()
+
+    def add_stats(self, stats):
+        """Добавляет итоги таблицы (или её части) к накопленным и обновляет textfile."""
+        if stats.table_name in self.tables:
+            self.tables[stats.table_name].merge(stats)
+        else:
+            self.tables[stats.table_name] = dataclasses.replace(stats)
+        self.write_textfile()
+
+    def write_textfile(self):
+        """Пишет итоги и прогресс по таблицам в формате Prometheus; файл подменяется атомарно.
+
+        Файл прогресса части (totals=False) удаляется, когда часть загружена.
+        """
+        if not self.prometheus_path:
+            return
+        self._textfile_written = time.perf_counter()
+        if not self.totals and not self._progress:
+            if os.path.exists(self.prometheus_path):
+                os.remove(self.prometheus_path)
+            return
+        lines = self._progress_lines()
+        if self.totals:
+            lines += self._totals_lines()
+        tmp_path = f'{self.prometheus_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as textfile:
+            textfile.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.prometheus_path)
+
+    def _progress_lines(self) -> list[str]:
+        # Части таблицы различаются меткой part, у таблицы целиком она пустая.
+        metrics = {
+            'migration_progress_done_rows': ('Обработано строк в незавершённой таблице', 'done'),
+            'migration_progress_expected_rows': ('Ожидается строк в незавершённой таблице', 'total'),
+            'migration_progress_eta_seconds': ('Оценка оставшегося времени', 'eta'),
+        }
+        lines = []
+        for name, (help_text, key) in metrics.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+            lines += [f'{name}{{table="{t}",part="{p.strip()}"}} {progress[key]}'
+                      for (t, p), progress in self._progress.items()]
+        return lines
+
+    def _totals_lines(self) -> list[str]:
+        metrics = {
+            'migration_rows_total': ('counter', 'Перенесённые строки', lambda s: s.rows),
+            'migration_rejected_rows_total': ('counter', 'Отброшенные при преобразовании строки',
+                                              lambda s: s.rejected),
+            'migration_rows_per_second': ('gauge', 'Средняя скорость переноса', lambda s: s.rows_per_second),
+        }
+        lines = []
+        for name, (kind, help_text, value) in metrics.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            lines += [f'{name}{{table="{t}"}} {value(s)}' for t, s in self.tables.items()]
+        lines += ['# HELP migration_stage_seconds_total Время по стадиям',
+                  '# TYPE migration_stage_seconds_total counter']
+        for t, s in self.tables.items():
+            lines += [f'migration_stage_seconds_total{{table="{t}",stage="{stage}"}} {getattr(s, f"{stage}_seconds")}'
+                      for stage in STAGES]
+        lines += ['# HELP migration_last_update_timestamp_seconds Время последнего обновления',
+                  '# TYPE migration_last_update_timestamp_seconds gauge',
+                  f'migration_last_update_timestamp_seconds {time.time()}']
+        return lines
+
+    def close(self):
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+
+
+@contextmanager
+def profiled(path: str | None, profiler: str = 'cprofile'):
+    """Профилирует блок и сохраняет результат в path (.prof для cProfile, .html для pyinstrument)."""
+    if not path:
+        yield
+        return
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError('Для --profiler pyinstrument установите пакет pyinstrument')
+        instrument = Profiler()
+        instrument.start()
+        try:
+            yield
+        finally:
+            instrument.stop()
+            with open(path, 'w', encoding='utf-8') as report:
+                report.write(instrument.output_html())
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
@@ -0,0 +1,407 @@
+"""Схема content для массовой загрузки: таблицы без вторичных индексов и внешних ключей.
+
+Те же таблицы, что в schema_design/movies_database.ddl, но при создании остаются
+только первичные ключи и ограничения уникальности, на которые опирается
+ON CONFLICT в load_data.py. Индексы строятся параллельно уже после загрузки,
+внешние ключи добавляются как NOT VALID и проверяются отдельно, затем ANALYZE.
+
+Для полной перезаливки таблицы создаются рядом как UNLOGGED-копии с суффиксом
+__shadow, после загрузки переводятся в LOGGED и подменяют рабочие переименованием
+в одной транзакции; прежние таблицы остаются с суффиксом __old для отката.
+"""
+import logging
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_WORK_MEM = '1GB'
+INDEX_WORKERS = 4
+SHADOW_SUFFIX = '__shadow'
+OLD_SUFFIX = '__old'
+# Переименование ждёт эксклюзивной блокировки; дольше ждать не стоит, чтобы не копить очередь запросов админки.
+SWAP_LOCK_TIMEOUT = '10s'
+
+BARE_TABLES = """
+CREATE SCHEMA IF NOT EXISTS content;
+
+CREATE TABLE IF NOT EXISTS content.film_work (
+    id uuid PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    creation_date DATE,
+    file_path TEXT,
+    rating FLOAT,
+    type TEXT not null,
+    created TIMESTAMP WITH TIME ZONE,
+    modified TIMESTAMP WITH TIME ZONE,
+    search_vector TSVECTOR
+);
+
+CREATE TABLE IF NOT EXISTS content.person (
+    id uuid PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    created TIMESTAMP WITH TIME ZONE,
+    modified TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS content.genre (
+    id uuid PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    created TIMESTAMP WITH TIME ZONE,
+    modified TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS content.genre_film_work (
+    id UUID PRIMARY KEY,
+    genre_id UUID NOT NULL,
+    film_work_id UUID NOT NULL,
+    created TIMESTAMP WITH TIME ZONE,
+
+    CONSTRAINT uk_genre_film_work UNIQUE (genre_id, film_work_id)
+);
+
+CREATE TABLE IF NOT EXISTS content.person_film_work (
+    id UUID PRIMARY KEY,
+    person_id UUID NOT NULL,
+    film_work_id UUID NOT NULL,
+    role TEXT NOT NULL,
+    created TIMESTAMP WITH TIME ZONE,
+
+    CONSTRAINT uk_person_film_work UNIQUE (person_id, film_work_id)
+);
+"""
+
+# search_vector заполняется триггером так же, как в миграции movies 0005.
+SEARCH_VECTOR_FUNCTION = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION content.film_work_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# (имя индекса, таблица, определение после ON таблица)
+INDEXES = (
+    ('idx_genre_film_work_genre_id', 'genre_film_work', '(genre_id)'),
+    ('idx_genre_film_work_film_work_id', 'genre_film_work', '(film_work_id)'),
+    ('idx_person_film_work_person_id', 'person_film_work', '(person_id)'),
+    ('idx_person_film_work_film_work_id', 'person_film_work', '(film_work_id)'),
+    ('idx_film_work_title', 'film_work', '(title)'),
+    ('idx_film_work_creation_date', 'film_work', '(creation_date)'),
+    ('idx_film_work_rating', 'film_work', '(rating)'),
+    # Индексы админки, те же имена, что в миграциях movies 0004, 0005 и 0012.
+    ('film_work_creation_date_id_idx', 'film_work', '(creation_date DESC NULLS LAST, id DESC)'),
+    ('genre_name_id_idx', 'genre', '(name, id)'),
+    ('person_full_name_id_idx', 'person', '(full_name, id)'),
+    ('film_work_search_vector_idx', 'film_work', 'USING gin (search_vector)'),
+    ('person_full_name_trgm_idx', 'person', 'USING gin (upper(full_name) gin_trgm_ops)'),
+    ('person_full_name_upper_c_idx', 'person', '((upper(full_name) COLLATE "C"), id)'),
+)
+
+# (таблица, имя ограничения, колонка, родительская таблица)
+FOREIGN_KEYS = (
+    ('genre_film_work', 'fk_genre', 'genre_id', 'genre'),
+    ('genre_film_work', 'fk_film_work', 'film_work_id', 'film_work'),
+    ('person_film_work', 'fk_person', 'person_id', 'person'),
+    ('person_film_work', 'fk_film_work', 'film_work_id', 'film_work'),
+)
+
+# Родительские таблицы идут раньше таблиц связей: в таком порядке их можно переводить в LOGGED.
+TABLES = ('film_work', 'genre', 'person', 'genre_film_work', 'person_film_work')
+
+
+def _scalar(row, key: str):
+    return row[key] if isinstance(row, dict) else row[0]
+
+
+def create_search_trigger(cur, suffix: str = ''):
+    cur.execute(SEARCH_VECTOR_FUNCTION)
+    cur.execute(f"DROP TRIGGER IF EXISTS film_work_search_vector_trigger ON content.film_work{suffix};")
+    cur.execute(f"""
+        CREATE TRIGGER film_work_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description ON content.film_work{suffix}
+        FOR EACH ROW EXECUTE FUNCTION content.film_work_search_vector_update();
+    """)
+
+
+def drop_secondary_indexes(cur) -> list[str]:
+    """Удаляет вторичные индексы и внешние ключи из INDEXES и FOREIGN_KEYS, возвращает удалённые."""
+    dropped = []
+    for table, name, _, _ in FOREIGN_KEYS:
+        cur.execute(
+            "SELECT 1 FROM pg_constraint WHERE conname = %s AND conrelid = %s::regclass;",
+            (name, f'content.{table}'),
+        )
+        if cur.fetchone() is not None:
+            cur.execute(f"ALTER TABLE content.{table} DROP CONSTRAINT {name};")
+            dropped.append(f'{table}.{name}')
+    for name, _, _ in INDEXES:
+        if _exists(cur, f'content.{name}'):
+            cur.execute(f"DROP INDEX content.{name};")
+            dropped.append(name)
+    return dropped
+
+
+def create_bare_tables(connection: psycopg.Connection):
+    """Создаёт таблицы content без вторичных индексов и внешних ключей.
+
+    Если схема уже есть (например, из schema_design или миграций админки), её вторичные
+    индексы и внешние ключи удаляются: иначе загрузка поддерживала бы их на каждой строке.
+    finish_bulk_load строит их заново.
+    """
+    with connection.cursor() as cur:
+        cur.execute(BARE_TABLES)
+        create_search_trigger(cur)
+        dropped = drop_secondary_indexes(cur)
+    connection.commit()
+    if dropped:
+        logger.warning(f"Перед загрузкой удалены индексы и внешние ключи: {', '.join(dropped)}")
+    logger.info("Таблицы content созданы без вторичных индексов и внешних ключей")
+
+
+def create_shadow_tables(connection: psycopg.Connection, recreate: bool = True):
+    """Создаёт UNLOGGED-копии таблиц с суффиксом __shadow; recreate удаляет недогруженные копии."""
+    # Имена ограничений, как и индексов, уникальны в схеме, поэтому им тоже нужен суффикс.
+    ddl = re.sub(r'CREATE TABLE IF NOT EXISTS content\.(\w+)',
+                 rf'CREATE UNLOGGED TABLE IF NOT EXISTS content.\1{SHADOW_SUFFIX}', BARE_TABLES)
+    ddl = re.sub(r'CONSTRAINT (\w+)', rf'CONSTRAINT \1{SHADOW_SUFFIX}', ddl)
+    with connection.cursor() as cur:
+        if recreate:
+            for table in reversed(TABLES):
+                cur.execute(f"DROP TABLE IF EXISTS content.{table}{SHADOW_SUFFIX} CASCADE;")
+        cur.execute(ddl)
+        create_search_trigger(cur, SHADOW_SUFFIX)
+    connection.commit()
+    logger.info(f"Созданы UNLOGGED-таблицы content.*{SHADOW_SUFFIX}")
+
+
+def _build_index(dsl: dict, index_sql: str, maintenance_work_mem: str) -> float:
+    # Выполняется в отдельном процессе: у каждого индекса своя сессия и свой maintenance_work_mem.
+    started = time.perf_counter()
+    with psycopg.connect(**dsl, autocommit=True) as conn:
+        conn.execute(f"SET maintenance_work_mem = '{maintenance_work_mem}'")
+        conn.execute(index_sql)
+    return time.perf_counter() - started
+
+
+def build_indexes(dsl: dict, workers: int = INDEX_WORKERS, maintenance_work_mem: str = MAINTENANCE_WORK_MEM,
+                  suffix: str = ''):
+    """Строит вторичные индексы одновременно; CREATE INDEX на одной таблице друг друга не блокируют."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for name, table, definition in INDEXES:
+            index_sql = f"CREATE INDEX IF NOT EXISTS {name}{suffix} ON content.{table}{suffix} {definition};"
+            futures.append((name, pool.submit(_build_index, dsl, index_sql, maintenance_work_mem)))
+        for name, future in futures:
+            logger.info(f"Индекс {name}{suffix} построен за {future.result():.1f} с")
+
+
+def add_foreign_keys(connection: psycopg.Connection, suffix: str = ''):
+    """Добавляет внешние ключи как NOT VALID и проверяет существующие строки через VALIDATE.
+
+    Если в таблице связей есть ссылки на строки, не попавшие в загрузку,
+    ограничение остаётся NOT VALID (для новых строк оно уже действует) и пишется ошибка.
+    """
+    with connection.cursor() as cur:
+        for table, name, column, parent in FOREIGN_KEYS:
+            table, name, parent = f'{table}{suffix}', f'{name}{suffix}', f'{parent}{suffix}'
+            cur.execute(
+                "SELECT convalidated FROM pg_constraint WHERE conname = %s AND conrelid = %s::regclass;",
+                (name, f'content.{table}'),
+            )
+            row = cur.fetchone()
+            if row is None:
+                cur.execute(f"""
+                    ALTER TABLE content.{table} ADD CONSTRAINT {name}
+                    FOREIGN KEY ({column}) REFERENCES content.{parent}(id) ON DELETE CASCADE NOT VALID;
+                """)
+                connection.commit()
+            elif _scalar(row, 'convalidated'):
+                continue
+
+            cur.execute(f"""
+                SELECT count(*) AS orphans FROM content.{table} AS child
+                WHERE NOT EXISTS (SELECT 1 FROM content.{parent} AS p WHERE p.id = child.{column});
+            """)
+            orphans = _scalar(cur.fetchone(), 'orphans')
+            if orphans:
+                logger.error(f"Ограничение {table}.{name} не проверено: {orphans} строк ссылаются "
+                             f"на отсутствующие записи {parent}")
+                continue
+            started = time.perf_counter()
+            cur.execute(f"ALTER TABLE content.{table} VALIDATE CONSTRAINT {name};")
+            connection.commit()
+            logger.info(f"Ограничение {table}.{name} проверено за {time.perf_counter() - started:.1f} с")
+
+
+def analyze(connection: psycopg.Connection, suffix: str = ''):
+    with connection.cursor() as cur:
+        for table in TABLES:
+            cur.execute(f"ANALYZE content.{table}{suffix};")
+    connection.commit()
+
+
+def set_logged(connection: psycopg.Connection, suffix: str = SHADOW_SUFFIX):
+    """Переводит копии в LOGGED: таблица и её индексы один раз целиком пишутся в WAL."""
+    with connection.cursor() as cur:
+        for table in TABLES:
+            started = time.perf_counter()
+            cur.execute(f"ALTER TABLE content.{table}{suffix} SET LOGGED;")
+            connection.commit()
+            logger.info(f"Таблица {table}{suffix} переведена в LOGGED за {time.perf_counter() - started:.1f} с")
+
+
+def finish_bulk_load(dsl: dict, connection: psycopg.Connection, workers: int = INDEX_WORKERS,
+                     maintenance_work_mem: str = MAINTENANCE_WORK_MEM, suffix: str = ''):
+    """Достраивает таблицы после загрузки; для теневых копий (suffix) ещё и переводит их в LOGGED."""
+    started = time.perf_counter()
+    build_indexes(dsl, workers, maintenance_work_mem, suffix)
+    if suffix:
+        # Ссылаться на UNLOGGED-таблицу из LOGGED нельзя, поэтому внешние ключи добавляются после.
+        set_logged(connection, suffix)
+    add_foreign_keys(connection, suffix)
+    analyze(connection, suffix)
+    logger.info(f"✅ Индексы, ограничения и статистика готовы за {time.perf_counter() - started:.1f} с")
+
+
+def _exists(cur, relation: str) -> bool:
+    cur.execute("SELECT to_regclass(%s) AS relation;", (relation,))
+    return _scalar(cur.fetchone(), 'relation') is not None
+
+
+def _rename_relations(cur, table: str, suffix_from: str, suffix_to: str):
+    """Переименовывает таблицу content.{table}{suffix_from} с её ограничениями и индексами.
+
+    У объектов с суффиксом suffix_from он заменяется на suffix_to, к остальным suffix_to дописывается.
+    """
+    source = f'content.{table}{suffix_from}'
+    cur.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass;", (source,))
+    constraints = [_scalar(row, 'conname') for row in cur.fetchall()]
+    # Индексы ограничений переименовываются вместе с ними.
+    cur.execute("""
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = i.indexrelid);
+    """, (source,))
+    indexes = [_scalar(row, 'relname') for row in cur.fetchall()]
+
+    def renamed(name: str) -> str:
+        return name.replace(suffix_from, suffix_to) if suffix_from and suffix_from in name else f'{name}{suffix_to}'
+
+    for name in constraints:
+        cur.execute(f'ALTER TABLE {source} RENAME CONSTRAINT "{name}" TO "{renamed(name)}";')
+    for name in indexes:
+        cur.execute(f'ALTER INDEX content."{name}" RENAME TO "{renamed(name)}";')
+    cur.execute(f'ALTER TABLE {source} RENAME TO "{table}{suffix_to}";')
+
+
+def swap_tables(connection: psycopg.Connection, incoming: str = SHADOW_SUFFIX, outgoing: str = OLD_SUFFIX):
+    """Подменяет рабочие таблицы копиями с суффиксом incoming в одной транзакции.
+
+    Рабочие таблицы получают суффикс outgoing (прежние таблицы с этим суффиксом удаляются).
+    Откат — тот же вызов с incoming=OLD_SUFFIX и outgoing=SHADOW_SUFFIX.
+    """
+    started = time.perf_counter()
+    with connection.cursor() as cur:
+        cur.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}';")
+        if not all(_exists(cur, f'content.{table}{incoming}') for table in TABLES):
+            raise RuntimeError(f"Нет таблиц content.*{incoming} для подмены")
+        for table in reversed(TABLES):
+            cur.execute(f"DROP TABLE IF EXISTS content.{table}{outgoing} CASCADE;")
+        for table in TABLES:
+            # При первой загрузке рабочих таблиц ещё нет.
+            if _exists(cur, f'content.{table}'):
+                _rename_relations(cur, table, '', outgoing)
+            _rename_relations(cur, table, incoming, '')
+    connection.commit()
+    logger.info(f"✅ Таблицы content.*{incoming} подменили рабочие за {time.perf_counter() - started:.2f} с, "
+                f"прежние сохранены как content.*{outgoing}")
+
+
+# Триггеры content.film_work_document из миграции movies 0006: (таблица, функция, события).
+DOCUMENT_TABLE = 'content.film_work_document'
+# Очередь фильмов, чьи документы отложены в сессиях загрузчика (миграция movies 0011).
+DIRTY_TABLE = 'content.film_work_document_dirty'
+DRAIN_CHUNK = 1000
+DOCUMENT_REFRESH_SETTING = 'content.film_work_document_refresh'
+DOCUMENT_TRIGGERS = (
+    ('film_work', 'film_work_document_film_work', ('INSERT', 'UPDATE', 'DELETE')),
+    ('genre_film_work', 'film_work_document_links', ('INSERT', 'UPDATE', 'DELETE')),
+    ('person_film_work', 'film_work_document_links', ('INSERT', 'UPDATE', 'DELETE')),
+    ('genre', 'film_work_document_genre', ('UPDATE',)),
+    ('person', 'film_work_document_person', ('UPDATE',)),
+)
+TRANSITION_TABLES = {
+    'INSERT': 'NEW TABLE AS new_rows',
+    'UPDATE': 'OLD TABLE AS old_rows NEW TABLE AS new_rows',
+    'DELETE': 'OLD TABLE AS old_rows',
+}
+
+
+def refresh_film_work_documents(connection: psycopg.Connection):
+    """Вешает триггеры документа фильма на рабочие таблицы и пересобирает content.film_work_document.
+
+    Нужна после --bulk и --swap: подменённые таблицы создаются без этих триггеров,
+    а документы собраны по прежним данным. Если миграций админки ещё нет, ничего не делает.
+    """
+    started = time.perf_counter()
+    with connection.cursor() as cur:
+        if not _exists(cur, DOCUMENT_TABLE):
+            logger.info(f"Таблицы {DOCUMENT_TABLE} нет, документы фильмов не пересобираются")
+            return
+        for table, function, events in DOCUMENT_TRIGGERS:
+            for event in events:
+                trigger = f'film_work_document_{event.lower()}'
+                cur.execute(f"DROP TRIGGER IF EXISTS {trigger} ON content.{table};")
+                cur.execute(f"CREATE TRIGGER {trigger} AFTER {event} ON content.{table} "
+                            f"REFERENCING {TRANSITION_TABLES[event]} "
+                            f"FOR EACH STATEMENT EXECUTE FUNCTION content.{function}();")
+        if _exists(cur, DIRTY_TABLE):
+            # Полная пересборка покрывает всю очередь; то, что попадёт в неё позже, останется.
+            cur.execute(f"DELETE FROM {DIRTY_TABLE};")
+        cur.execute("SELECT content.film_work_document_refresh(ARRAY(SELECT id FROM content.film_work));")
+        cur.execute(f"DELETE FROM {DOCUMENT_TABLE} d "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM content.film_work fw WHERE fw.id = d.id);")
+    connection.commit()
+    logger.info(f"✅ {DOCUMENT_TABLE} пересобрана за {time.perf_counter() - started:.1f} с")
+
+
+def drain_film_work_documents(connection: psycopg.Connection, chunk: int = DRAIN_CHUNK):
+    """Пересобирает документы фильмов из очереди content.film_work_document_dirty.
+
+    Каждые chunk фильмов — отдельная короткая транзакция, так что блокировки фильмов
+    держатся недолго и не пересекаются с загрузкой. Без очереди ничего не делает.
+    """
+    started = time.perf_counter()
+    films = 0
+    with connection.cursor() as cur:
+        if not _exists(cur, DIRTY_TABLE):
+            connection.commit()
+            return
+        while True:
+            cur.execute(f"""
+                DELETE FROM {DIRTY_TABLE}
+                WHERE film_work_id IN (SELECT film_work_id FROM {DIRTY_TABLE} LIMIT %s)
+                RETURNING film_work_id;
+            """, (chunk,))
+            ids = sorted({_scalar(row, 'film_work_id') for row in cur.fetchall()})
+            if not ids:
+                connection.commit()
+                break
+            cur.execute("SELECT content.film_work_document_refresh(%s::uuid[]);", (ids,))
+            connection.commit()
+            films += len(ids)
+    if films:
+        logger.info(f"✅ Документы {films} фильмов пересобраны за {time.perf_counter() - started:.1f} с")
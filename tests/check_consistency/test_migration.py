@@ -1,5 +1,9 @@
 import sqlite3
 import psycopg
+import argparse
+import hashlib
+import random
+from concurrent.futures import ProcessPoolExecutor
 from psycopg.rows import dict_row
 import uuid
 from datetime import datetime
@@ -14,6 +18,7 @@ from dotenv import load_dotenv
 from datetime import datetime
 from contextlib import closing
 from dataclasses import dataclass, astuple
+from dataclasses import fields
 from typing import Generator
 from uuid import UUID
 from datetime import timezone
@@ -23,6 +28,10 @@ DB_SQLITE_PATH = os.environ.get('SQLITE_DB_PATH',
     os.path.join(os.path.dirname(__file__), '..', '..', 'sqlite_to_postgres', 'db.sqlite'))
 DB_SQLITE = 'db.sqlite'
 BATCH_SIZE = 100
+# Размер куска при потоковой сверке и сколько расходящихся id печатать на таблицу.
+CHUNK_SIZE = 1000
+MAX_REPORTED_IDS = 100
+SAMPLE_SIZE = 1000
 
 
 @dataclass
@@ -176,10 +185,284 @@ def test_transfer(sqlite_cursor: sqlite3.Cursor, pg_cursor: psycopg.Cursor):
         assert original_batch == transferred_batch 
         print(f"✅ Таблица {table_name} — OK")
 
+PG_COLUMNS = {'created_at': 'created AS created_at', 'updated_at': 'modified AS updated_at'}
+LINK_KEYS = {'person_film_work': 'film_work_id, person_id', 'genre_film_work': 'film_work_id, genre_id'}
+
+
+def normalize_value(value):
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).isoformat()
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return str(value)
+
+
+def normalize_row(dataclass_type, row) -> tuple:
+    return tuple(normalize_value(v) for v in astuple(dataclass_type(**dict(row))))
+
+
+def normalize_rows(dataclass_type, rows, rejected: list) -> list[tuple]:
+    """Приводит строки к кортежам; id строк, которые не собираются в dataclass, дописывает в rejected.
+
+    Такие строки загрузчик отправляет в dead letter, а сверка продолжается без них.
+    """
+    normalized = []
+    for row in rows:
+        try:
+            normalized.append(normalize_row(dataclass_type, row))
+        except (TypeError, ValueError):
+            rejected.append(str(row['id']))
+    return normalized
+
+
+def chunk_digest(rows: list[tuple]) -> str:
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(repr(row).encode())
+    return digest.hexdigest()
+
+
+def sqlite_dedup_condition(table_name: str) -> str:
+    # Для связей в Postgres попадает первая по rowid строка каждой пары (ON CONFLICT DO NOTHING).
+    if table_name not in LINK_KEYS:
+        return '1 = 1'
+    return f'rowid IN (SELECT min(rowid) FROM {table_name} GROUP BY {LINK_KEYS[table_name]})'
+
+
+def sqlite_source_query(table_name: str, columns: list[str]) -> str:
+    return (
+        f"SELECT {', '.join(columns)} FROM {table_name} "
+        f"WHERE {sqlite_dedup_condition(table_name)} ORDER BY lower(id)"
+    )
+
+
+def fetch_pg_range(pg_conn, table_name: str, columns: list[str], dataclass_type,
+                   lower: str | None, upper: str, rejected: list) -> list[tuple]:
+    select = ', '.join(PG_COLUMNS.get(c, c) for c in columns)
+    condition = 'id <= %s::uuid' if lower is None else 'id > %s::uuid AND id <= %s::uuid'
+    params = [upper] if lower is None else [lower, upper]
+    with pg_conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(f'SELECT {select} FROM content.{table_name} WHERE {condition} ORDER BY id', params)
+        return normalize_rows(dataclass_type, cur.fetchall(), rejected)
+
+
+def compare_chunk(source: list[tuple], target: list[tuple], report: dict):
+    source_by_id = {row[0]: row for row in source}
+    target_by_id = {row[0]: row for row in target}
+    for row_id, row in source_by_id.items():
+        if row_id not in target_by_id:
+            report['missing'].append(row_id)
+        elif target_by_id[row_id] != row:
+            report['different'].append(row_id)
+    report['extra'].extend(row_id for row_id in target_by_id if row_id not in source_by_id)
+
+
+def check_table_hashed(sqlite_conn: sqlite3.Connection, pg_conn, table_name: str, dataclass_type,
+                       chunk_size: int = CHUNK_SIZE) -> dict:
+    """Сверяет таблицу кусками по chunk_size строк в порядке id.
+
+    Для каждого куска SQLite берутся строки Postgres из того же диапазона id и
+    сравниваются хеши; построчное сравнение выполняется только для несовпавших кусков.
+    Строки SQLite, которые не проходят проверку dataclass, попадают в rejected,
+    такие же строки Postgres — в different.
+    """
+    columns = [f.name for f in fields(dataclass_type)]
+    report = {'rows': 0, 'chunks': 0, 'mismatched_chunks': 0, 'missing': [], 'extra': [], 'different': [],
+              'rejected': []}
+    sqlite_cur = sqlite_conn.cursor()
+    sqlite_cur.row_factory = sqlite3.Row
+    sqlite_cur.execute(sqlite_source_query(table_name, columns))
+    lower = None
+    while chunk := sqlite_cur.fetchmany(chunk_size):
+        source = normalize_rows(dataclass_type, chunk, report['rejected'])
+        if not source:
+            # Без целых строк границы куска нет, его диапазон войдёт в следующий кусок.
+            continue
+        upper = source[-1][0]
+        target = fetch_pg_range(pg_conn, table_name, columns, dataclass_type, lower, upper, report['different'])
+        report['rows'] += len(source)
+        report['chunks'] += 1
+        if chunk_digest(source) != chunk_digest(target):
+            report['mismatched_chunks'] += 1
+            compare_chunk(source, target, report)
+        lower = upper
+
+    # Строки Postgres правее последнего id из SQLite — лишние.
+    select = ', '.join(PG_COLUMNS.get(c, c) for c in columns)
+    condition, params = ('', []) if lower is None else (' WHERE id > %s::uuid', [lower])
+    with pg_conn.cursor(name=f'check_{table_name}_tail', row_factory=dict_row) as cur:
+        cur.execute(f'SELECT {select} FROM content.{table_name}{condition} ORDER BY id', params)
+        while tail := cur.fetchmany(chunk_size):
+            report['extra'].extend(str(row['id']) for row in tail)
+    return report
+
+
+def check_transfer_hashed(sqlite_conn: sqlite3.Connection, pg_conn, chunk_size: int = CHUNK_SIZE):
+    failed = []
+    for table_name, dataclass_type in TABLES.items():
+        print(f'Сверяем таблицу {table_name}')
+        report = check_table_hashed(sqlite_conn, pg_conn, table_name, dataclass_type, chunk_size)
+        problems = {key: report[key] for key in ('missing', 'extra', 'different') if report[key]}
+        if report['rejected']:
+            print(f"   rejected: {len(report['rejected'])} — {report['rejected'][:MAX_REPORTED_IDS]}")
+        if not problems:
+            print(f"✅ Таблица {table_name} — OK ({report['rows']} строк, {report['chunks']} кусков)")
+            continue
+        failed.append(table_name)
+        print(f"❌ Таблица {table_name}: не совпали {report['mismatched_chunks']} из {report['chunks']} кусков")
+        for key, ids in problems.items():
+            print(f'   {key}: {len(ids)} — {ids[:MAX_REPORTED_IDS]}')
+    assert not failed, f'Расхождения в таблицах: {failed}'
+
+
+# Колонки, которые входят в контрольные суммы: их текст одинаков в SQLite и Postgres.
+CHECKSUM_COLUMNS = {
+    'genre': ('id', 'name'),
+    'film_work': ('id', 'title'),
+    'person': ('id', 'full_name'),
+    'genre_film_work': ('id', 'film_work_id', 'genre_id'),
+    'person_film_work': ('id', 'film_work_id', 'person_id', 'role'),
+}
+
+
+class Md5Aggregate:
+    """Аналог md5(string_agg(value, ',')) из Postgres для SQLite."""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        self.values.append(value)
+
+    def finalize(self):
+        return hashlib.md5(','.join(self.values).encode()).hexdigest()
+
+
+def sqlite_checksums(sqlite_conn: sqlite3.Connection, table_name: str) -> dict[str, tuple[int, str]]:
+    """Количество строк и md5 по диапазонам id (первый hex-символ id)."""
+    sqlite_conn.create_aggregate('md5_agg', 1, Md5Aggregate)
+    value = " || '|' || ".join(
+        f'lower({c})' if c.endswith('id') else f"coalesce({c}, '')" for c in CHECKSUM_COLUMNS[table_name]
+    )
+    rows = sqlite_conn.execute(f"""
+        SELECT bucket, count(*), md5_agg(value) FROM (
+            SELECT substr(lower(id), 1, 1) AS bucket, {value} AS value FROM {table_name}
+            WHERE {sqlite_dedup_condition(table_name)} ORDER BY lower(id)
+        ) GROUP BY bucket
+    """).fetchall()
+    return {bucket: (count, checksum) for bucket, count, checksum in rows}
+
+
+def pg_checksums(pg_conn, table_name: str) -> dict[str, tuple[int, str]]:
+    value = " || '|' || ".join(f"coalesce({c}::text, '')" for c in CHECKSUM_COLUMNS[table_name])
+    with pg_conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT left(id::text, 1), count(*), md5(string_agg({value}, ',' ORDER BY id))
+            FROM content.{table_name} GROUP BY 1
+        """)
+        return {bucket: (count, checksum) for bucket, count, checksum in cur.fetchall()}
+
+
+def sample_rows(sqlite_conn: sqlite3.Connection, pg_conn, table_name: str, dataclass_type,
+                sample_size: int, seed: int | None = None) -> tuple[list[str], list[str]]:
+    """Сравнивает случайную выборку строк целиком.
+
+    Возвращает id расходящихся строк и id строк SQLite, которые не проходят проверку dataclass.
+    """
+    low, high = sqlite_conn.execute(f'SELECT min(rowid), max(rowid) FROM {table_name}').fetchone()
+    if low is None:
+        return [], []
+    rng = random.Random(seed)
+    rowids = rng.sample(range(low, high + 1), min(sample_size, high - low + 1))
+    columns = [f.name for f in fields(dataclass_type)]
+    placeholders = ', '.join('?' * len(rowids))
+    sqlite_cur = sqlite_conn.cursor()
+    sqlite_cur.row_factory = sqlite3.Row
+    sqlite_cur.execute(
+        f"SELECT {', '.join(columns)} FROM {table_name} "
+        f"WHERE rowid IN ({placeholders}) AND {sqlite_dedup_condition(table_name)}",
+        rowids,
+    )
+    rejected, mismatched = [], []
+    source = {row[0]: row for row in normalize_rows(dataclass_type, sqlite_cur.fetchall(), rejected)}
+    if not source:
+        return mismatched, rejected
+    select = ', '.join(PG_COLUMNS.get(c, c) for c in columns)
+    with pg_conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(f'SELECT {select} FROM content.{table_name} WHERE id = ANY(%s::uuid[])', [list(source)])
+        target = {row[0]: row for row in normalize_rows(dataclass_type, cur.fetchall(), mismatched)}
+    mismatched += [row_id for row_id, row in source.items() if row_id not in mismatched and target.get(row_id) != row]
+    return mismatched, rejected
+
+
+def preflight_table(sqlite_path: str, dsl: dict, table_name: str, sample_size: int = SAMPLE_SIZE,
+                    seed: int | None = None) -> dict:
+    # Выполняется в отдельном процессе со своими соединениями.
+    with closing(sqlite3.connect(f'file:{sqlite_path}?mode=ro', uri=True)) as sqlite_conn, \
+            closing(psycopg.connect(**dsl)) as pg_conn:
+        source = sqlite_checksums(sqlite_conn, table_name)
+        target = pg_checksums(pg_conn, table_name)
+        buckets = sorted(set(source) | set(target))
+        mismatched, rejected = sample_rows(sqlite_conn, pg_conn, table_name, TABLES[table_name], sample_size, seed)
+        return {
+            'source_rows': sum(count for count, _ in source.values()),
+            'target_rows': sum(count for count, _ in target.values()),
+            'mismatched_ranges': [b for b in buckets if source.get(b) != target.get(b)],
+            'mismatched_samples': mismatched,
+            'rejected_samples': rejected,
+        }
+
+
+def check_transfer_preflight(sqlite_path: str, dsl: dict, sample_size: int = SAMPLE_SIZE,
+                             workers: int = len(TABLES), seed: int | None = None):
+    """Быстрая проверка: количества строк, контрольные суммы диапазонов id и случайная выборка.
+
+    Таблицы проверяются параллельно в отдельных процессах.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            table_name: pool.submit(preflight_table, sqlite_path, dsl, table_name, sample_size, seed)
+            for table_name in TABLES
+        }
+        reports = {table_name: future.result() for table_name, future in futures.items()}
+
+    failed = []
+    for table_name, report in reports.items():
+        ok = (report['source_rows'] == report['target_rows']
+              and not report['mismatched_ranges'] and not report['mismatched_samples'])
+        if report['rejected_samples']:
+            print(f"   Таблица {table_name}: строки выборки, не прошедшие проверку, "
+                  f"{report['rejected_samples'][:MAX_REPORTED_IDS]}")
+        if ok:
+            print(f"✅ Таблица {table_name} — OK ({report['target_rows']} строк)")
+            continue
+        failed.append(table_name)
+        print(f"❌ Таблица {table_name}: строк {report['source_rows']} -> {report['target_rows']}, "
+              f"диапазоны id {report['mismatched_ranges']}, "
+              f"расходящиеся строки выборки {report['mismatched_samples'][:MAX_REPORTED_IDS]}")
+    assert not failed, f'Расхождения в таблицах: {failed}'
+
+
 if __name__ == '__main__':
-    dsl = {'dbname': os.environ.get('DB_NAME'), 'user': os.environ.get('DB_USER'),'password': os.environ.get('DB_PASSWORD'), 'host': os.environ.get('DB_HOST', '127.0.0.1'), 'port': os.environ.get('DB_PORT', 5432)}
-    with closing(sqlite3.connect('/home/maksllo/new_admin_panel_sprint_1/sqlite_to_postgres/db.sqlite')) as sqlite_conn, closing(psycopg.connect(**dsl)) as pg_conn:
-        sqlite_conn.row_factory = sqlite3.Row
-        with closing(sqlite_conn.cursor()) as sqlite_cur, closing(pg_conn.cursor(row_factory=dict_row)) as pg_cur:
-            test_transfer(sqlite_cur, pg_cur)
+    parser = argparse.ArgumentParser(description='Проверка переноса данных из SQLite в PostgreSQL')
+    parser.add_argument('--sqlite-path', default=DB_SQLITE_PATH)
+    parser.add_argument('--mode', choices=('exact', 'hash', 'preflight'), default='exact',
+                        help='exact — сравнение целиком в памяти, hash — потоковая сверка хешей кусков, '
+                             'preflight — количества, контрольные суммы и выборка строк')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE)
+    parser.add_argument('--workers', type=int, default=len(TABLES))
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
 
+    dsl = {'dbname': os.environ.get('DB_NAME'), 'user': os.environ.get('DB_USER'),'password': os.environ.get('DB_PASSWORD'), 'host': os.environ.get('DB_HOST', '127.0.0.1'), 'port': os.environ.get('DB_PORT', 5432)}
+    if args.mode == 'preflight':
+        check_transfer_preflight(args.sqlite_path, dsl, args.sample_size, args.workers, args.seed)
+    else:
+        with closing(sqlite3.connect(args.sqlite_path)) as sqlite_conn, closing(psycopg.connect(**dsl)) as pg_conn:
+            if args.mode == 'hash':
+                check_transfer_hashed(sqlite_conn, pg_conn, args.chunk_size)
+            else:
+                sqlite_conn.row_factory = sqlite3.Row
+                with closing(sqlite_conn.cursor()) as sqlite_cur, closing(pg_conn.cursor(row_factory=dict_row)) as pg_cur:
+                    test_transfer(sqlite_cur, pg_cur)